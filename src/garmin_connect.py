@@ -8,16 +8,36 @@ import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
 import os
+import pickle
+import hashlib
 import numpy as np
 
 # Carrega as variáveis de ambiente
 load_dotenv()
 
+# Diretório do cache local de atividades (corpo da resposta + ETag/Last-Modified)
+CACHE_DIR = ".garmin_cache"
+
+# Formato de data/hora local usado pelo Garmin Connect (ex.: 2025-04-26 06:16:25)
+FORMATO_DATA_GARMIN = "%Y-%m-%d %H:%M:%S"
+
+def converter_datas_garmin(datas, errors="raise"):
+    """Converte datas do Garmin pelo formato conhecido, inferindo o formato das que não o seguirem"""
+    convertidas = pd.to_datetime(datas, format=FORMATO_DATA_GARMIN, cache=True, errors="coerce")
+    
+    # Outros formatos (ex.: "2025-04-26T06:16:25.0") passam pela inferência, só nessas linhas;
+    # errors vale para elas ("raise" levanta em datas inválidas, "coerce" as troca por NaT)
+    faltantes = convertidas.isna() & datas.notna()
+    if faltantes.any():
+        convertidas[faltantes] = pd.to_datetime(datas[faltantes], cache=True, errors=errors)
+    return convertidas
+
 class GarminConnection:
     def __init__(self, email=None, password=None):
         self.email = email or os.getenv("GARMIN_EMAIL")
         self.password = password or os.getenv("GARMIN_PASSWORD")
         self.client = None
+        self._cache_atividades = {}
         
     def conectar(self):
         """Conecta à API do Garmin Connect"""
@@ -43,24 +63,81 @@ class GarminConnection:
             raise Exception("Não conectado ao Garmin Connect")
             
         try:
-            atividades = self.client.get_activities(0, limite)
+            atividades = self._buscar_atividades(limite)
             print(f"✅ {len(atividades)} atividades obtidas")
             return atividades
             
         except Exception as e:
             print(f"❌ Erro ao obter atividades: {str(e)}")
             return []
-
-def calcular_pace(row):
-    """Calcula o pace em min/km de forma segura"""
-    try:
-        if row['distancia_km'] > 0 and row['duracao_minutos'] > 0:
-            pace = row['duracao_minutos'] / row['distancia_km']
-            # Limita o pace entre 3 e 15 min/km (valores razoáveis)
-            return min(max(pace, 3), 15)
-    except:
-        pass
-    return None
+    
+    def _caminho_cache(self, limite):
+        """Caminho do arquivo de cache para a chave (email, limite)"""
+        chave = hashlib.sha1(f"{self.email}:{limite}".encode("utf-8")).hexdigest()
+        return os.path.join(CACHE_DIR, f"atividades_{chave}.pkl")
+    
+    def _ler_cache(self, limite):
+        """Lê o cache em memória ou, na falta dele, o cache em disco"""
+        if limite in self._cache_atividades:
+            return self._cache_atividades[limite]
+        
+        caminho = self._caminho_cache(limite)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, "rb") as f:
+                cache = pickle.load(f)
+        except Exception:
+            return None
+        self._cache_atividades[limite] = cache
+        return cache
+    
+    def _salvar_cache(self, limite, atividades, resposta):
+        """Salva as atividades e os cabeçalhos de validação em disco"""
+        cache = {
+            "atividades": atividades,
+            "etag": resposta.headers.get("ETag"),
+            "last_modified": resposta.headers.get("Last-Modified")
+        }
+        self._cache_atividades[limite] = cache
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(self._caminho_cache(limite), "wb") as f:
+                pickle.dump(cache, f)
+        except Exception as e:
+            print(f"⚠️ Não foi possível salvar o cache de atividades: {str(e)}")
+    
+    def _buscar_atividades(self, limite):
+        """Busca atividades com GET condicional (ETag/Last-Modified), reutilizando o cache local em caso de 304"""
+        garth = getattr(self.client, "garth", None)
+        url = getattr(self.client, "garmin_connect_activities", None)
+        if garth is None or url is None:
+            # Versão da biblioteca sem acesso à sessão HTTP: busca sem cache
+            return self.client.get_activities(0, limite)
+        
+        cache = self._ler_cache(limite)
+        headers = {}
+        if cache:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+        
+        resposta = garth.request(
+            "GET", "connectapi", url,
+            api=True,
+            params={"start": 0, "limit": limite},
+            headers=headers
+        )
+        
+        if resposta.status_code == 304 and cache:
+            print("♻️ Atividades inalteradas, usando cache local")
+            return cache["atividades"]
+        
+        atividades = resposta.json()
+        if resposta.headers.get("ETag") or resposta.headers.get("Last-Modified"):
+            self._salvar_cache(limite, atividades, resposta)
+        return atividades
 
 def testar_garmin():
     conexao = GarminConnection()
@@ -77,7 +154,7 @@ def testar_garmin():
             df = pd.DataFrame(atividades)
             
             # Formata as colunas de data
-            df['startTimeLocal'] = pd.to_datetime(df['startTimeLocal'])
+            df['startTimeLocal'] = converter_datas_garmin(df['startTimeLocal'])
             
             # Seleciona colunas importantes
             colunas_importantes = [
@@ -96,28 +173,30 @@ def testar_garmin():
             df_formatado = df[colunas_disponiveis].copy()
             
             # Adiciona colunas calculadas com validação
-            df_formatado['distancia_km'] = df_formatado['distance'].apply(
-                lambda x: x/1000 if pd.notnull(x) and x > 0 else None
-            )
+            distancia = pd.to_numeric(df_formatado['distance'], errors='coerce').to_numpy(dtype='float64')
+            df_formatado['distancia_km'] = np.where(distancia > 0, distancia / 1000.0, np.nan)
             
-            df_formatado['duracao_minutos'] = df_formatado['duration'].apply(
-                lambda x: x/60 if pd.notnull(x) and x > 0 else None
-            )
+            duracao = pd.to_numeric(df_formatado['duration'], errors='coerce').to_numpy(dtype='float64')
+            df_formatado['duracao_minutos'] = np.where(duracao > 0, duracao / 60.0, np.nan)
             
-            # Calcula pace com validação
-            df_formatado['pace_min_km'] = df_formatado.apply(calcular_pace, axis=1)
+            # Calcula pace com validação (vetorizado, sem apply por linha)
+            dist = df_formatado['distancia_km'].to_numpy(dtype='float64')
+            dur = df_formatado['duracao_minutos'].to_numpy(dtype='float64')
+            validos = (dist > 0) & (dur > 0)
+            pace = np.divide(dur, dist, out=np.full_like(dur, np.nan), where=validos)
+            # Limita o pace entre 3 e 15 min/km (valores razoáveis)
+            df_formatado['pace_min_km'] = np.clip(pace, 3, 15)
             
             # Remove linhas com valores inválidos
             df_formatado = df_formatado.dropna(subset=['distancia_km', 'duracao_minutos', 'pace_min_km'])
             
-            # Remove outliers usando IQR
-            Q1 = df_formatado['pace_min_km'].quantile(0.25)
-            Q3 = df_formatado['pace_min_km'].quantile(0.75)
-            IQR = Q3 - Q1
-            df_formatado = df_formatado[
-                (df_formatado['pace_min_km'] >= Q1 - 1.5 * IQR) &
-                (df_formatado['pace_min_km'] <= Q3 + 1.5 * IQR)
-            ]
+            # Remove outliers usando IQR (quartis calculados em uma única passada)
+            paces = df_formatado['pace_min_km'].to_numpy(dtype='float64')
+            if len(paces) > 0:
+                Q1, Q3 = np.quantile(paces, [0.25, 0.75])
+                IQR = Q3 - Q1
+                mascara = (paces >= Q1 - 1.5 * IQR) & (paces <= Q3 + 1.5 * IQR)
+                df_formatado = df_formatado.iloc[mascara]
             
             # Salva em CSV
             df_formatado.to_csv('atividades_garmin.csv', index=False)
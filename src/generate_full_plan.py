@@ -1,35 +1,206 @@
 import os
-import json
+import orjson
+import functools
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import openai
+from types import MappingProxyType
 from dotenv import load_dotenv
-from langchain.agents import Tool, AgentExecutor, LLMSingleActionAgent
-from langchain_community.chat_models import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import BaseChatPromptTemplate
-from langchain.schema import HumanMessage, SystemMessage
-from typing import List, Union, Dict
-from langchain.output_parsers import ResponseSchema, StructuredOutputParser
-from sklearn.linear_model import LinearRegression
+from typing import List, Union, Dict, Mapping, Tuple
+from garmin_connect import converter_datas_garmin
 
 # Carrega variáveis de ambiente
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+
+@functools.lru_cache(maxsize=1)
+def _http_client():
+    """Cliente HTTP compartilhado, reaproveitando conexões TLS entre as chamadas ao LLM"""
+    import httpx
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=10),
+        timeout=httpx.Timeout(120.0, connect=10.0)
+    )
+
+@functools.lru_cache(maxsize=1)
+def _openai():
+    """Importa e configura o cliente da OpenAI apenas quando necessário"""
+    import openai
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    openai.http_client = _http_client()
+    return openai
+
+# Tabelas fixas, criadas uma única vez na carga do módulo
+TRADUCAO_DIAS = MappingProxyType({
+    "Monday": "Segunda-feira",
+    "Tuesday": "Terça-feira",
+    "Wednesday": "Quarta-feira",
+    "Thursday": "Quinta-feira",
+    "Friday": "Sexta-feira",
+    "Saturday": "Sábado",
+    "Sunday": "Domingo"
+})
+
+# Ajuste (min/km) somado ao pace médio por tipo de treino
+AJUSTES_RITMO = MappingProxyType({
+    "Base": 0,
+    "Longo": 0.5,
+    "Intervalado": -1.0,
+    "Ritmo": -0.5,
+    "Fartlek": -0.3,
+    "MEIA MARATONA": -0.5
+})
+
+# Fator multiplicado pelo pace médio por tipo de treino
+FATORES_RITMO = MappingProxyType({
+    "Base": 1.05,  # 5% mais lento
+    "Longo": 1.10,  # 10% mais lento
+    "Intervalado": 0.85,  # 15% mais rápido
+    "Ritmo": 0.95,  # 5% mais rápido
+    "Fartlek": 0.90,  # 10% mais rápido
+    "MEIA MARATONA": 0.95  # 5% mais rápido
+})
+
+DESCRICOES_TREINO = MappingProxyType({
+    "Base": "Corrida contínua em ritmo moderado para desenvolver resistência aeróbica",
+    "Longo": "Treino longo para desenvolver resistência e adaptação à distância",
+    "Intervalado": "Treino intervalado para melhorar velocidade e VO2max",
+    "Ritmo": "Treino no ritmo-alvo da prova para desenvolver pace",
+    "Fartlek": "Variações de ritmo para desenvolver diferentes sistemas energéticos",
+    "MEIA MARATONA": "Prova de meia maratona - 21.1km"
+})
+
+DICAS_TREINO = MappingProxyType({
+    "Base": "Mantenha respiração controlada e ritmo constante",
+    "Longo": "Hidrate-se a cada 20-30 minutos, considere levar gel energético",
+    "Intervalado": "Foque na qualidade dos tiros, recupere bem entre as séries",
+    "Ritmo": "Mantenha o ritmo constante, controle a respiração",
+    "Fartlek": "Alterne os ritmos de forma progressiva, sem explosões",
+    "MEIA MARATONA": "Siga sua estratégia de prova, hidratação e alimentação"
+})
+
+# Resposta estruturada da progressão (o esquema exige um objeto na raiz)
+MODELO_ESTRUTURADO = "gpt-4o-mini"
+ESQUEMA_PROGRESSAO = {
+    "name": "progressao",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "distancias": {"type": "array", "items": {"type": "number"}}
+        },
+        "required": ["distancias"],
+        "additionalProperties": False
+    }
+}
+
+# Início da semana de taper (26/05 a 01/06), como ordinal de data
+INICIO_TAPER_ORDINAL = datetime(2025, 5, 26).toordinal()
+
+# Calendário de treinos até a meia maratona em 01/06, com as datas já convertidas em ordinal
+DATAS_TREINO = tuple(
+    MappingProxyType({**entrada, "data_ordinal": datetime.strptime(entrada["data"], "%d/%m/%Y").toordinal()})
+    for entrada in [
+        # Semana 1
+        {"data": "13/04/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 14.0},
+        {"data": "16/04/2025", "dia": "Terça", "tipo": "Intervalado"},
+        {"data": "18/04/2025", "dia": "Quinta", "tipo": "Fartlek"},
+        
+        # Semana 2
+        {"data": "20/04/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 15.4},
+        {"data": "23/04/2025", "dia": "Terça", "tipo": "Base"},
+        {"data": "25/04/2025", "dia": "Quinta", "tipo": "Ritmo"},
+        
+        # Semana 3
+        {"data": "27/04/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 16.8},
+        {"data": "30/04/2025", "dia": "Terça", "tipo": "Intervalado"},
+        {"data": "02/05/2025", "dia": "Quinta", "tipo": "Fartlek"},
+        
+        # Semana 4
+        {"data": "04/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 18.0},
+        {"data": "07/05/2025", "dia": "Terça", "tipo": "Base"},
+        {"data": "09/05/2025", "dia": "Quinta", "tipo": "Ritmo"},
+        
+        # Semana 5
+        {"data": "11/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 19.0},
+        {"data": "14/05/2025", "dia": "Terça", "tipo": "Intervalado"},
+        {"data": "16/05/2025", "dia": "Quinta", "tipo": "Fartlek"},
+        
+        # Semana 6
+        {"data": "18/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 19.5},
+        {"data": "21/05/2025", "dia": "Terça", "tipo": "Base"},
+        {"data": "23/05/2025", "dia": "Quinta", "tipo": "Ritmo"},
+        
+        # Semana 7 (Taper)
+        {"data": "25/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 15.0},
+        {"data": "28/05/2025", "dia": "Terça", "tipo": "Ritmo Leve"},
+        {"data": "30/05/2025", "dia": "Quinta", "tipo": "Trote Suave"},
+        
+        # Dia da Prova
+        {"data": "01/06/2025", "dia": "Domingo", "tipo": "MEIA MARATONA", "distancia": 21.1}
+    ]
+)
 
 def traduzir_dia(dia_en):
     """Traduz o nome do dia da semana de inglês para português"""
-    traducao = {
-        "Monday": "Segunda-feira",
-        "Tuesday": "Terça-feira",
-        "Wednesday": "Quarta-feira",
-        "Thursday": "Quinta-feira",
-        "Friday": "Sexta-feira",
-        "Saturday": "Sábado",
-        "Sunday": "Domingo"
+    return TRADUCAO_DIAS.get(dia_en, dia_en)
+
+# Tamanho do bloco de leitura do CSV (limita o pico de memória em históricos longos)
+TAMANHO_CHUNK = 65_536
+COLUNAS_NUMERICAS = ['distancia_km', 'duracao_minutos', 'pace_min_km', 'averageHR']
+RITMO_PADRAO = 7.0
+
+def _novo_agregado():
+    """Cria os acumuladores usados na leitura do CSV em blocos"""
+    return {
+        'soma': {coluna: 0.0 for coluna in COLUNAS_NUMERICAS},
+        'contagem': {coluna: 0 for coluna in COLUNAS_NUMERICAS},
+        'max_distancia': np.nan,
+        'pace_inicial': None,
+        'pace_final': None,
+        'volume_por_semana': {},
+        'datas_min': [],
+        'datas_max': [],
+        'total': 0
     }
-    return traducao.get(dia_en, dia_en)
+
+def _atualizar_agregados(chunk, agg):
+    """Acumula somas, contagens e extremos de um bloco do CSV"""
+    # Células malformadas viram NaN; float32 reduz pela metade a memória das colunas numéricas
+    for coluna in COLUNAS_NUMERICAS:
+        chunk[coluna] = pd.to_numeric(chunk[coluna], errors='coerce', downcast='float')
+    
+    # Uma única passada sobre as colunas numéricas do bloco
+    stats = chunk[COLUNAS_NUMERICAS].agg(['sum', 'count', 'max'])
+    for coluna in COLUNAS_NUMERICAS:
+        agg['soma'][coluna] += float(stats.loc['sum', coluna])
+        agg['contagem'][coluna] += int(stats.loc['count', coluna])
+    
+    # Datas malformadas impedem a conversão na leitura; converte tratando erros
+    if not pd.api.types.is_datetime64_any_dtype(chunk['startTimeLocal']):
+        chunk['startTimeLocal'] = converter_datas_garmin(chunk['startTimeLocal'], errors='coerce')
+    
+    agg['max_distancia'] = np.fmax(agg['max_distancia'], stats.loc['max', 'distancia_km'])
+    
+    paces = chunk['pace_min_km'].to_numpy()
+    if len(paces) > 0:
+        if agg['pace_inicial'] is None:
+            agg['pace_inicial'] = paces[0]
+        agg['pace_final'] = paces[-1]
+    
+    # Soma a distância por semana (semanas podem atravessar blocos)
+    semanal = chunk.set_index('startTimeLocal')['distancia_km'].resample('W').sum()
+    for semana, soma in semanal.items():
+        agg['volume_por_semana'][semana] = agg['volume_por_semana'].get(semana, 0.0) + float(soma)
+    
+    agg['datas_min'].append(chunk['startTimeLocal'].min())
+    agg['datas_max'].append(chunk['startTimeLocal'].max())
+    agg['total'] += len(chunk)
+
+def _media(agg, coluna):
+    """Média a partir dos acumuladores de soma e contagem"""
+    contagem = agg['contagem'][coluna]
+    return agg['soma'][coluna] / contagem if contagem else np.nan
 
 def analisar_dados_garmin(arquivo_csv):
     """Analisa os dados do Garmin para extrair informações relevantes"""
@@ -39,44 +210,55 @@ def analisar_dados_garmin(arquivo_csv):
             print(f"Erro: O arquivo '{arquivo_csv}' não foi encontrado.")
             return None
         
-        # Carrega os dados
-        df = pd.read_csv(arquivo_csv)
-        print("Colunas disponíveis:", df.columns.tolist())
+        # Lê apenas o cabeçalho para validar as colunas
+        colunas = pd.read_csv(arquivo_csv, nrows=0).columns.tolist()
+        print("Colunas disponíveis:", colunas)
         
         # Verifica se as colunas necessárias existem
-        colunas_necessarias = ['distancia_km', 'duracao_minutos', 'pace_min_km', 'averageHR', 'startTimeLocal']
+        colunas_necessarias = COLUNAS_NUMERICAS + ['startTimeLocal']
         for coluna in colunas_necessarias:
-            if coluna not in df.columns:
+            if coluna not in colunas:
                 print(f"Erro: Coluna '{coluna}' não encontrada no arquivo CSV.")
                 return None
         
-        # Converte colunas para numérico, tratando erros
-        for coluna in ['distancia_km', 'duracao_minutos', 'pace_min_km', 'averageHR']:
-            df[coluna] = pd.to_numeric(df[coluna], errors='coerce')
-        
-        # Converte coluna de data para datetime
-        df['startTimeLocal'] = pd.to_datetime(df['startTimeLocal'], errors='coerce')
+        # Carrega os dados em blocos, acumulando as estatísticas
+        agg = _novo_agregado()
+        leitor = pd.read_csv(
+            arquivo_csv,
+            chunksize=TAMANHO_CHUNK,
+            parse_dates=['startTimeLocal']
+        )
+        for chunk in leitor:
+            _atualizar_agregados(chunk, agg)
+        
+        if agg['total'] == 0:
+            print(f"Erro: O arquivo '{arquivo_csv}' não contém atividades.")
+            return None
         
-        # Calcula métricas com tratamento de erros
-        media_distancia = df['distancia_km'].mean()
-        max_distancia = df['distancia_km'].max()
-        media_duracao = df['duracao_minutos'].mean()
-        media_pace = df['pace_min_km'].mean()
-        media_fc = df['averageHR'].mean()
+        # Calcula métricas a partir dos acumuladores
+        media_distancia = _media(agg, 'distancia_km')
+        max_distancia = agg['max_distancia']
+        media_duracao = _media(agg, 'duracao_minutos')
+        media_pace = _media(agg, 'pace_min_km')
+        media_fc = _media(agg, 'averageHR')
         
         # Verifica se há pelo menos 2 registros para calcular a melhora do pace
-        if len(df) > 1:
-            melhora_pace = df['pace_min_km'].iloc[-1] - df['pace_min_km'].iloc[0]
+        if agg['total'] > 1:
+            melhora_pace = agg['pace_final'] - agg['pace_inicial']
         else:
             melhora_pace = 0
         
-        # Calcula volume semanal médio
-        df['semana'] = df['startTimeLocal'].dt.isocalendar().week
-        volume_semanal = df.groupby('semana')['distancia_km'].sum().mean()
+        # Calcula volume semanal médio (semanas sem treino contam como zero, como no resample)
+        semanas = agg['volume_por_semana']
+        if semanas:
+            total_semanas = (max(semanas) - min(semanas)).days // 7 + 1
+            volume_semanal = sum(semanas.values()) / total_semanas
+        else:
+            volume_semanal = np.nan
         
         # Formata período de dados
-        data_min = df['startTimeLocal'].min()
-        data_max = df['startTimeLocal'].max()
+        data_min = pd.Series(agg['datas_min']).min()
+        data_max = pd.Series(agg['datas_max']).max()
         periodo_dados = f"{data_min.strftime('%d/%m/%Y')} a {data_max.strftime('%d/%m/%Y')}"
         
         # Cria o resumo com valores convertidos para float
@@ -87,7 +269,7 @@ def analisar_dados_garmin(arquivo_csv):
             'media_pace': float(media_pace),
             'melhora_pace': float(melhora_pace),
             'media_fc': float(media_fc),
-            'total_atividades': len(df),
+            'total_atividades': agg['total'],
             'periodo_dados': periodo_dados,
             'volume_semanal': float(volume_semanal)
         }
@@ -103,6 +285,7 @@ def analisar_dados_garmin(arquivo_csv):
 class AgenteGarminBase:
     def __init__(self, llm):
         self.llm = llm
+        from langchain.memory import ConversationBufferMemory
         self.memory = ConversationBufferMemory()
 
 class AgenteDados(AgenteGarminBase):
@@ -116,7 +299,7 @@ class AgenteDados(AgenteGarminBase):
     
     def validar_dados(self, df: pd.DataFrame) -> Dict:
         try:
-            df['startTimeLocal'] = pd.to_datetime(df['startTimeLocal'])
+            df['startTimeLocal'] = converter_datas_garmin(df['startTimeLocal'])
             df = df.sort_values('startTimeLocal')
             
             # Filtra dados inválidos
@@ -145,13 +328,15 @@ class AgenteDados(AgenteGarminBase):
         if len(serie) < 2:
             return 0.0
         
-        X = np.arange(len(serie)).reshape(-1, 1)
-        y = serie.values.reshape(-1, 1)
-        reg = LinearRegression().fit(X, y)
+        # Coeficiente angular por mínimos quadrados: cov(x, y) / var(x)
+        y = serie.to_numpy(dtype='float64')
+        x = np.arange(len(y))
+        dx = x - x.mean()
+        inclinacao = (dx * (y - y.mean())).sum() / (dx ** 2).sum()
         
         # Converte coeficiente angular em taxa semanal
-        taxa_semanal = (reg.coef_[0] * 7) / serie.mean()
-        return taxa_semanal
+        taxa_semanal = (inclinacao * 7) / y.mean()
+        return float(taxa_semanal)
 
 class AgenteProgressao(AgenteGarminBase):
     def __init__(self, llm):
@@ -180,17 +365,35 @@ class AgenteProgressao(AgenteGarminBase):
         4. NÃO ultrapasse 21km em NENHUMA hipótese
         5. O último treino DEVE ser exatamente 21km
         
-        Retorne APENAS um array JSON com 9 números entre {metricas['max_distancia']:.1f} e 21.0
+        Retorne em "distancias" exatamente 9 números entre {metricas['max_distancia']:.1f} e 21.0
         
-        Exemplo de formato esperado para progressão segura:
+        Exemplo de progressão segura:
         [14.0, 15.0, 16.0, 17.0, 18.0, 19.0, 19.5, 20.0, 21.0]
         """
         
-        response = self.llm.predict(prompt)
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            print("Erro ao decodificar JSON da resposta do LLM")
+            # Saída estruturada: o modelo devolve JSON válido conforme o esquema
+            response = _openai().chat.completions.create(
+                model=MODELO_ESTRUTURADO,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_schema", "json_schema": ESQUEMA_PROGRESSAO},
+                temperature=0.7
+            )
+            mensagem = response.choices[0].message
+            if getattr(mensagem, "refusal", None):
+                print(f"LLM recusou gerar a progressão: {mensagem.refusal}")
+                return None
+            
+            distancias = orjson.loads(mensagem.content)["distancias"]
+            if len(distancias) != 9:
+                print(f"Progressão com {len(distancias)} semanas, esperado 9")
+                return None
+            return distancias
+        except Exception as e:
+            print(f"Erro ao obter progressão do LLM: {str(e)}")
             return None
 
 class AgenteTreinos(AgenteGarminBase):
@@ -214,9 +417,12 @@ class AgenteTreinos(AgenteGarminBase):
         5. Fartlek (quartas ou sextas)
         """
     
-    def gerar_treino(self, tipo: str, metricas: Dict, data: str = None, distancia: float = None) -> Dict:
+    def gerar_treino(self, tipo: str, metricas: Dict, data: str = None, distancia: float = None,
+                     data_ordinal: int = None) -> Dict:
         # Verifica se é semana de taper (26/05 a 01/06)
-        is_taper = data and datetime.strptime(data, "%d/%m/%Y") >= datetime(2025, 5, 26)
+        if data_ordinal is None and data:
+            data_ordinal = datetime.strptime(data, "%d/%m/%Y").toordinal()
+        is_taper = data_ordinal is not None and data_ordinal >= INICIO_TAPER_ORDINAL
         
         # Verifica se é treino de descanso
         if tipo == "Descanso":
@@ -233,16 +439,7 @@ class AgenteTreinos(AgenteGarminBase):
         
         # Calcula ritmo base (pace médio + ajuste baseado no tipo)
         ritmo_base = metricas['pace_medio']
-        ajustes_ritmo = {
-            "Base": 0,
-            "Longo": 0.5,
-            "Intervalado": -1.0,
-            "Ritmo": -0.5,
-            "Fartlek": -0.3,
-            "MEIA MARATONA": -0.5
-        }
-        
-        ritmo_treino = max(5.0, ritmo_base + ajustes_ritmo.get(tipo, 0))
+        ritmo_treino = max(5.0, ritmo_base + AJUSTES_RITMO.get(tipo, 0))
         
         # Formata o ritmo em min:seg
         min_ritmo = int(ritmo_treino)
@@ -275,31 +472,13 @@ class AgenteTreinos(AgenteGarminBase):
         return treino
 
     def _gerar_descricao_treino(self, tipo: str, is_taper: bool) -> str:
-        descricoes = {
-            "Base": "Corrida contínua em ritmo moderado para desenvolver resistência aeróbica",
-            "Longo": "Treino longo para desenvolver resistência e adaptação à distância",
-            "Intervalado": "Treino intervalado para melhorar velocidade e VO2max",
-            "Ritmo": "Treino no ritmo-alvo da prova para desenvolver pace",
-            "Fartlek": "Variações de ritmo para desenvolver diferentes sistemas energéticos",
-            "MEIA MARATONA": "Prova de meia maratona - 21.1km"
-        }
-        
-        desc = descricoes.get(tipo, "Treino base")
+        desc = DESCRICOES_TREINO.get(tipo, "Treino base")
         if is_taper:
             desc += " (Volume reduzido - Semana de Taper)"
         return desc
 
     def _gerar_dicas_treino(self, tipo: str, is_taper: bool) -> str:
-        dicas = {
-            "Base": "Mantenha respiração controlada e ritmo constante",
-            "Longo": "Hidrate-se a cada 20-30 minutos, considere levar gel energético",
-            "Intervalado": "Foque na qualidade dos tiros, recupere bem entre as séries",
-            "Ritmo": "Mantenha o ritmo constante, controle a respiração",
-            "Fartlek": "Alterne os ritmos de forma progressiva, sem explosões",
-            "MEIA MARATONA": "Siga sua estratégia de prova, hidratação e alimentação"
-        }
-        
-        dica = dicas.get(tipo, "Mantenha ritmo constante")
+        dica = DICAS_TREINO.get(tipo, "Mantenha ritmo constante")
         if is_taper:
             dica += ". Reduza volume mas mantenha qualidade"
         return dica
@@ -307,17 +486,7 @@ class AgenteTreinos(AgenteGarminBase):
     def _calcular_ritmo_treino(self, tipo: str, metricas: Dict) -> str:
         """Calcula e formata o ritmo do treino"""
         pace_base = metricas.get('pace_medio', 7.0)
-        
-        ajustes = {
-            "Base": 1.05,  # 5% mais lento
-            "Longo": 1.10,  # 10% mais lento
-            "Intervalado": 0.85,  # 15% mais rápido
-            "Ritmo": 0.95,  # 5% mais rápido
-            "Fartlek": 0.90,  # 10% mais rápido
-            "MEIA MARATONA": 0.95  # 5% mais rápido
-        }
-        
-        ritmo = pace_base * ajustes.get(tipo, 1.0)
+        ritmo = pace_base * FATORES_RITMO.get(tipo, 1.0)
         minutos = int(ritmo)
         segundos = int((ritmo - minutos) * 60)
         
@@ -384,6 +553,8 @@ class AgenteValidador(AgenteGarminBase):
     def validar_plano_completo(self, plano: Dict) -> Dict:
         try:
             treinos_validados = []
+            ultimo_longo = None
+            
             for treino in plano['treinos']:
                 # Validar dia da semana
                 if treino['tipo'] == 'Longo' and treino.get('dia_semana') != 'Sábado':
@@ -395,9 +566,7 @@ class AgenteValidador(AgenteGarminBase):
                     treino['tipo'] = 'Descanso'
                 
                 # Validar progressão das distâncias
-                if len(treinos_validados) > 0 and treino['tipo'] == 'Longo':
-                    ultimo_longo = next((t for t in reversed(treinos_validados) 
-                                      if t['tipo'] == 'Longo'), None)
+                if treino['tipo'] == 'Longo':
                     if ultimo_longo:
                         aumento = (treino['parte_principal']['distancia'] - 
                                  ultimo_longo['parte_principal']['distancia'])
@@ -409,6 +578,8 @@ class AgenteValidador(AgenteGarminBase):
                 
                 treino = self.validar_treino(treino)
                 treinos_validados.append(treino)
+                if treino['tipo'] == 'Longo':
+                    ultimo_longo = treino
             
             plano['treinos'] = treinos_validados
             return plano
@@ -427,10 +598,11 @@ class AgenteValidador(AgenteGarminBase):
             minutos, segundos = ritmo.replace('min/km', '').strip().split(':')
             return float(minutos) + float(segundos)/60
         except:
-            return 7.0  # Ritmo padrão em caso de erro
+            return RITMO_PADRAO  # Ritmo padrão em caso de erro
 
 class AgentePlanoCompleto:
     def __init__(self):
+        from langchain_openai import ChatOpenAI
         self.llm = ChatOpenAI(temperature=0.7)
         self.agente_dados = AgenteDados(self.llm)
         self.agente_progressao = AgenteProgressao(self.llm)
@@ -440,7 +612,8 @@ class AgentePlanoCompleto:
     def gerar_plano(self, arquivo_csv: str) -> str:
         try:
             print("🔍 Validando dados do Garmin...")
-            df = pd.read_csv(arquivo_csv)
+            # Leitura multi-thread via PyArrow, com datas já convertidas
+            df = pd.read_csv(arquivo_csv, engine='pyarrow', parse_dates=['startTimeLocal'])
             metricas = self.agente_dados.validar_dados(df)
             
             if metricas is None:
@@ -457,10 +630,11 @@ class AgentePlanoCompleto:
             
             for data in datas_treino:
                 treino = self.agente_treinos.gerar_treino(
-                    tipo=data['tipo'], 
+                    tipo=data['tipo'],
                     metricas=metricas,
                     data=data['data'],
-                    distancia=data.get('distancia')
+                    distancia=data.get('distancia'),
+                    data_ordinal=data.get('data_ordinal')
                 )
                 
                 if treino:
@@ -524,47 +698,9 @@ class AgentePlanoCompleto:
         5. Ajuste os ritmos conforme sua percepção de esforço
         """
 
-    def gerar_datas_treino(self) -> List[Dict]:
-        """Gera as datas dos treinos até a meia maratona em 01/06"""
-        return [
-            # Semana 1
-            {"data": "13/04/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 14.0},
-            {"data": "16/04/2025", "dia": "Terça", "tipo": "Intervalado"},
-            {"data": "18/04/2025", "dia": "Quinta", "tipo": "Fartlek"},
-            
-            # Semana 2
-            {"data": "20/04/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 15.4},
-            {"data": "23/04/2025", "dia": "Terça", "tipo": "Base"},
-            {"data": "25/04/2025", "dia": "Quinta", "tipo": "Ritmo"},
-            
-            # Semana 3
-            {"data": "27/04/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 16.8},
-            {"data": "30/04/2025", "dia": "Terça", "tipo": "Intervalado"},
-            {"data": "02/05/2025", "dia": "Quinta", "tipo": "Fartlek"},
-            
-            # Semana 4
-            {"data": "04/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 18.0},
-            {"data": "07/05/2025", "dia": "Terça", "tipo": "Base"},
-            {"data": "09/05/2025", "dia": "Quinta", "tipo": "Ritmo"},
-            
-            # Semana 5
-            {"data": "11/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 19.0},
-            {"data": "14/05/2025", "dia": "Terça", "tipo": "Intervalado"},
-            {"data": "16/05/2025", "dia": "Quinta", "tipo": "Fartlek"},
-            
-            # Semana 6
-            {"data": "18/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 19.5},
-            {"data": "21/05/2025", "dia": "Terça", "tipo": "Base"},
-            {"data": "23/05/2025", "dia": "Quinta", "tipo": "Ritmo"},
-            
-            # Semana 7 (Taper)
-            {"data": "25/05/2025", "dia": "Sábado", "tipo": "Longo", "distancia": 15.0},
-            {"data": "28/05/2025", "dia": "Terça", "tipo": "Ritmo Leve"},
-            {"data": "30/05/2025", "dia": "Quinta", "tipo": "Trote Suave"},
-            
-            # Dia da Prova
-            {"data": "01/06/2025", "dia": "Domingo", "tipo": "MEIA MARATONA", "distancia": 21.1}
-        ]
+    def gerar_datas_treino(self) -> Tuple[Mapping, ...]:
+        """Retorna o calendário fixo de treinos até a meia maratona em 01/06"""
+        return DATAS_TREINO
 
 # Uso
 if __name__ == "__main__":
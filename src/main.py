@@ -1,75 +1,194 @@
+import re
+from datetime import date
 import streamlit as st
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
 from training_agent import TrainingAI
 
+# Static widget options
+LEVELS = ("Beginner", "Intermediate", "Advanced")
+FEEDBACK_TYPES = ("Too intense", "Too light", "Adjust distances", "Adjust paces", "Other")
+PREFERENCES = (
+    "Shorter workouts", "Longer workouts", "More intervals",
+    "More base runs", "Include hills", "Avoid hills"
+)
+
+# Distances such as "5km" or "7.5 km"
+KM_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*km")
+
+# Intensity keyword swaps per feedback type, matched in a single pass
+INTENSITY_SWAPS = {
+    "Too intense": {
+        "fast pace": "moderate pace",
+        "high intensity": "moderate intensity",
+    },
+    "Too light": {
+        "easy pace": "moderate pace",
+        "low intensity": "moderate intensity",
+    },
+}
+# One alternation per feedback type, so only its own keywords are matched
+INTENSITY_PATTERNS = {
+    feedback_type: re.compile("|".join(re.escape(keyword) for keyword in swaps))
+    for feedback_type, swaps in INTENSITY_SWAPS.items()
+}
+
+# Workout header lines: contain both "Day" and ":"
+WORKOUT_HEADER_PATTERN = re.compile(r"^(?=.*Day)(?=.*:)", re.MULTILINE)
+
+
+@st.cache_resource(max_entries=1)
+def get_coach():
+    """Returns the training agent, created once per process and shared across reruns"""
+    return TrainingAI()
+
+
+# Generated plans kept in memory
+MAX_STORED_PLANS = 64
+
+
+@st.cache_resource(max_entries=1)
+def plan_store():
+    """Generated plans keyed by (goal, level, days, day), shared across reruns and sessions"""
+    # Across restarts, TrainingAI's own date-keyed cache in .cache/plans avoids new API calls
+    return {}
+
+
+def store_plan(key, plan):
+    """Stores a generated plan, dropping the oldest one above MAX_STORED_PLANS"""
+    plans = plan_store()
+    if key not in plans and len(plans) >= MAX_STORED_PLANS:
+        plans.pop(next(iter(plans)))
+    plans[key] = plan
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def adjust_details(details, feedback_type, preferences):
+    """Applies the intensity and preference adjustments to a single workout block"""
+    # Memoized per workout on (text, type, preferences tuple): workouts left unchanged by
+    # the previous adjustment skip the regex work when the same feedback is applied again
+    # Adjust intensity ("Too intense" reduces it, "Too light" increases it)
+    swaps = INTENSITY_SWAPS.get(feedback_type)
+    if swaps:
+        details = INTENSITY_PATTERNS[feedback_type].sub(
+            lambda match: swaps[match.group(0)],
+            details
+        )
 
-def extract_workouts_from_plan(plan_text):
-    """Extracts individual workouts from the plan text"""
-    # Basic implementation - may need adjustment based on your plan format
-    workouts = []
-    current_workout = {}
+    # Apply preferences
+    for pref in preferences:
+        if pref == "Shorter workouts":
+            # Reduce volume by 20%
+            details = KM_PATTERN.sub(
+                lambda match: f"{float(match.group(1)) * 0.8:.1f}km",
+                details
+            )
+        # Add more adjustments based on preferences
 
-    for line in plan_text.split('\n'):
-        if "Day" in line and ":" in line:
-            if current_workout:
-                workouts.append(current_workout)
-            current_workout = {"original_text": line}
-        elif current_workout:
-            current_workout["details"] = current_workout.get("details", "") + line + "\n"
+    return details
 
-    if current_workout:
-        workouts.append(current_workout)
 
-    return workouts
+def apply_feedback(plan_text, feedback):
+    """Adjusts every workout in the plan, one workout block at a time"""
+    # Nothing to rewrite when the user only filled in free-text details
+    needs_intensity = feedback["tipo"] in INTENSITY_SWAPS
+    needs_prefs = bool(feedback["preferencias"])
+    if not (needs_intensity or needs_prefs):
+        return plan_text
 
+    # Text before the first workout (introduction, summary) is left untouched
+    starts = [match.start() for match in WORKOUT_HEADER_PATTERN.finditer(plan_text)]
+    if not starts:
+        return plan_text
 
-def adjust_workout(original_workout, feedback):
-    """Adjusts a specific workout based on feedback"""
-    adjusted_workout = original_workout.copy()
+    preferences = tuple(sorted(feedback["preferencias"]))
+    return plan_text[:starts[0]] + "".join(
+        adjust_details(plan_text[start:end], feedback["tipo"], preferences)
+        for start, end in zip(starts, starts[1:] + [len(plan_text)])
+    )
 
-    # Adjust intensity
-    if feedback["tipo"] == "Too intense":
-        # Reduce intensity
-        adjusted_workout["details"] = adjusted_workout["details"].replace(
-            "fast pace", "moderate pace"
-        ).replace(
-            "high intensity", "moderate intensity"
-        )
-    elif feedback["tipo"] == "Too light":
-        # Increase intensity
-        adjusted_workout["details"] = adjusted_workout["details"].replace(
-            "easy pace", "moderate pace"
-        ).replace(
-            "low intensity", "moderate intensity"
-        )
 
-    # Apply preferences
-    for pref in feedback["preferencias"]:
-        if pref == "Shorter workouts":
-            # Reduce volume by 20%
-            adjusted_workout["details"] = adjusted_workout["details"].replace(
-                "km", lambda x: f"{float(x.group(0).replace('km', '')) * 0.8:.1f}km"
+@st.fragment
+def feedback_panel():
+    """Feedback section, rerun on its own so interactions don't re-execute the whole page"""
+    # Only appears if a plan exists
+    if not st.session_state.get("current_plan"):
+        return
+
+    st.header(f"📝 Plan Feedback (Version {st.session_state.get('plan_version', 1)})")
+
+    # Button to restore original version
+    if st.session_state.get("plan_version", 1) > 1:
+        if st.button("↩️ Restore Original Plan"):
+            st.session_state.current_plan = st.session_state.original_plan
+            st.session_state.plan_version = 1
+            # Only the feedback panel needs to redraw
+            st.rerun(scope="fragment")
+
+    # Batch the feedback inputs so editing them does not rerun the script
+    with st.form("feedback_form"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            feedback_type = st.selectbox(
+                "Type of adjustment needed:",
+                FEEDBACK_TYPES
+            )
+
+            feedback_level = st.slider(
+                "Impact level of adjustment:",
+                min_value=1, max_value=5, value=3,
+                help="1 = subtle adjustment, 5 = significant change"
             )
-        # Add more adjustments based on preferences
 
-    return adjusted_workout
+        with col2:
+            feedback_preferences = st.multiselect(
+                "Training preferences:",
+                PREFERENCES
+            )
+
+        feedback_details = st.text_area(
+            "Feedback details:",
+            placeholder="Describe what needs to be adjusted..."
+        )
+
+        submit_feedback = st.form_submit_button("Adjust Current Plan")
+
+    if submit_feedback:
+        with st.spinner("🤖 Adjusting your plan..."):
+            try:
+                # Prepare feedback
+                feedback = {
+                    "tipo": feedback_type,
+                    "nivel": feedback_level,
+                    "detalhes": feedback_details,
+                    "preferencias": feedback_preferences
+                }
+
+                # Adjust all workouts in a single pass over the plan
+                adjusted_plan = apply_feedback(st.session_state.current_plan, feedback)
+
+                # Update the plan
+                st.session_state.current_plan = adjusted_plan
+                st.session_state.plan_version += 1
+
+                st.markdown(adjusted_plan)
+                st.success(f"✅ Plan successfully adjusted! (Version {st.session_state.plan_version})")
+
+            except Exception as e:
+                st.error(f"❌ Error adjusting plan: {str(e)}")
+
 
 def main():
-    if 'plano_original' not in st.session_state:
-        st.session_state.plano_original = None
-    if 'plano_atual' not in st.session_state:
-        st.session_state.plano_atual = None
-    if 'versao_plano' not in st.session_state:
-        st.session_state.versao_plano = 1
-
-
-    st.set_page_config(
-        page_title="Training Assistant",
-        page_icon="🏃‍♂️",
-        layout="wide"
-    )
+    # Page config must be the first Streamlit command; apply it once per session
+    if not st.session_state.get("_page_configured"):
+        st.set_page_config(
+            page_title="Training Assistant",
+            page_icon="🏃‍♂️",
+            layout="wide"
+        )
+        st.session_state._page_configured = True
+
+    for key, default in (("original_plan", None), ("current_plan", None), ("plan_version", 1)):
+        st.session_state.setdefault(key, default)
 
     st.title("🏃‍♂️ Personalized Training Assistant")
 
@@ -87,7 +206,7 @@ def main():
         with col1:
             level = st.selectbox(
                 "Your current level:",
-                ["Beginner", "Intermediate", "Advanced"],
+                LEVELS,
                 index=1
             )
         with col2:
@@ -102,105 +221,35 @@ def main():
 
 
     if generate_plan:
-        with st.spinner("🤖 Generating your initial plan..."):
-            try:
-                # Create the training agent
-                coach = TrainingAI()
-
-                # Generate the plan (TrainingAI already fetches Garmin data)
-                plan = coach.gerar_plano(
-                    None,  # No need to pass data, TrainingAI fetches it
-                    goal,
-                    level,
-                    training_days
+        try:
+            # Each plan is a calendar starting on the day it was generated, so the day is part of the key
+            key = (goal, level, training_days, date.today())
+            plan = plan_store().get(key)
+            if plan is not None:
+                st.markdown(plan)
+            else:
+                # Show the plan as it is generated instead of waiting for the full response
+                # TrainingAI already fetches the Garmin data, so no dataframe is passed
+                plan = st.write_stream(
+                    get_coach().gerar_plano_stream(None, goal, level, training_days)
                 )
-
+                # Agent errors are raised, so only complete plans are stored
                 if plan:
-                    st.session_state.original_plan = plan
-                    st.session_state.current_plan = plan
-                    st.session_state.plan_version = 1
-                    st.markdown(plan)
-                    st.success("✅ Plan generated successfully!")
-                else:
-                    st.error("❌ Error generating plan")
-
-            except Exception as e:
-                st.error(f"❌ Error generating plan: {str(e)}")
-
-    # Feedback section (only appears if a plan exists)
-    if st.session_state.get("current_plan"):
-        st.header(f"📝 Plan Feedback (Version {st.session_state.get('plan_version', 1)})")
+                    store_plan(key, plan)
 
-        # Button to restore original version
-        if st.session_state.get("plan_version", 1) > 1:
-            if st.button("↩️ Restore Original Plan"):
-                st.session_state.current_plan = st.session_state.original_plan
+            if plan:
+                st.session_state.original_plan = plan
+                st.session_state.current_plan = plan
                 st.session_state.plan_version = 1
-                st.rerun()
-
-        col1, col2 = st.columns(2)
-
-        with col1:
-            feedback_type = st.selectbox(
-                "Type of adjustment needed:",
-                ["Too intense", "Too light", "Adjust distances", "Adjust paces", "Other"]
-            )
+                st.success("✅ Plan generated successfully!")
+            else:
+                st.error("❌ Error generating plan")
 
-            feedback_level = st.slider(
-                "Impact level of adjustment:",
-                min_value=1, max_value=5, value=3,
-                help="1 = subtle adjustment, 5 = significant change"
-            )
+        except Exception as e:
+            st.error(f"❌ Error generating plan: {str(e)}")
 
-        with col2:
-            feedback_preferences = st.multiselect(
-                "Training preferences:",
-                ["Shorter workouts", "Longer workouts", "More intervals",
-                 "More base runs", "Include hills", "Avoid hills"]
-            )
-
-        feedback_details = st.text_area(
-            "Feedback details:",
-            placeholder="Describe what needs to be adjusted..."
-        )
-
-        if st.button("Adjust Current Plan"):
-            with st.spinner("🤖 Adjusting your plan..."):
-                try:
-                    # Extract workouts from the current plan
-                    workouts = extract_workouts_from_plan(st.session_state.current_plan)
-
-                    # Prepare feedback
-                    feedback = {
-                        "tipo": feedback_type,
-                        "nivel": feedback_level,
-                        "detalhes": feedback_details,
-                        "preferencias": feedback_preferences
-                    }
-
-                    # Adjust each workout
-                    adjusted_workouts = [
-                        adjust_workout(workout, feedback)
-                        for workout in workouts
-                    ]
-
-                    # Build the new plan
-                    adjusted_plan = st.session_state.current_plan
-                    for original, adjusted in zip(workouts, adjusted_workouts):
-                        adjusted_plan = adjusted_plan.replace(
-                            original["original_text"] + original.get("details", ""),
-                            adjusted["original_text"] + adjusted.get("details", "")
-                        )
-
-                    # Update the plan
-                    st.session_state.current_plan = adjusted_plan
-                    st.session_state.plan_version += 1
-
-                    st.markdown(adjusted_plan)
-                    st.success(f"✅ Plan successfully adjusted! (Version {st.session_state.plan_version})")
-
-                except Exception as e:
-                    st.error(f"❌ Error adjusting plan: {str(e)}")
+    # Feedback section (only appears if a plan exists)
+    feedback_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,27 +1,20 @@
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime
 import os
-from dotenv import load_dotenv
-import json
-import xml.etree.ElementTree as ET
+import re
+import string
+import functools
+import orjson
+from xml.sax.saxutils import escape
 import csv
-from fpdf import FPDF
+import hashlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
-# Carrega variáveis de ambiente
-load_dotenv()
+# LangChain, FPDF e pandas só são importados quando usados (ver llm, prompt, gerar_pdf e gerar_csv_sisrun)
 
-class TrainingAI:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model_name="gpt-3.5-turbo",
-            temperature=0.7,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
-        
-        # Template do sistema
-        system_template = """
+# Template do sistema usado com a LLM do LangChain
+TEMPLATE_SISTEMA = """
         Você é um treinador expert em corrida, especializado em análise de dados e prescrição de treinos.
         
         DADOS DO ATLETA:
@@ -82,204 +75,430 @@ class TrainingAI:
         
         Responda em português do Brasil, formatando o plano de forma clara e organizada.
         """
+
+# Esqueleto do prompt do plano de 60 dias, compilado uma vez; só os campos variáveis mudam por chamada
+PROMPT_PLANO = string.Template("""
+        Você é um treinador expert em corrida, especializado em análise de dados e prescrição de treinos.
         
-        self.prompt = ChatPromptTemplate.from_template(system_template)
+        DADOS DO ATLETA:
+        ${dados_resumidos}
+
+        OBJETIVO DO ATLETA:
+        ${objetivo}
+
+        PERFIL:
+        - Nível: ${nivel}
+        - Dias disponíveis: ${dias_treino} dias/semana
+
+        DIRETRIZES PARA O PLANO:
+        1. Baseie a progressão nos dados históricos
+        2. Mantenha pelo menos 1 dia de recuperação entre treinos intensos
+        3. Use o pace médio atual de ${pace_medio} min/km como referência
+        4. Use a FC média de ${fc_media} bpm como referência
+        5. Especifique SEMPRE ritmos em min/km como valores numéricos (exemplo: 5:30-6:00 min/km)
+        6. NUNCA use 'inf' ou valores indefinidos para ritmos
+        7. IMPORTANTE: Crie um plano COMPLETO para os próximos 60 dias (2 meses) com datas específicas
+        8. Organize os treinos DIA A DIA com datas exatas
+        9. Inclua pelo menos um treino longo por semana, aumentando gradualmente até chegar a 21 km no final do período
+
+        TIPOS DE TREINO A INCLUIR (distribua ao longo da semana):
+        1. Treino Regenerativo/Leve (recuperação ativa)
+        2. Treino Base/Contínuo (volume)
+        3. Treino Intervalado (velocidade)
+        4. Treino Longo (resistência)
+        5. Treino de Ritmo (pace específico)
+        6. Fartlek (variações de ritmo)
+        7. Subidas (quando apropriado)
+        8. Dias de Descanso
+
+        ESTRUTURA DO PLANO:
+        Para cada dia, especifique:
+        1. Data exata (DD/MM/AAAA)
+        2. Dia da semana (Segunda, Terça, etc.)
+        3. Tipo de treino (use a variedade acima) ou "Descanso"
+        4. Para dias de treino: Distância, duração, ritmo alvo, zonas FC, justificativa e dicas
+        5. Para dias de descanso: apenas indique "Descanso" e uma breve justificativa
+
+        DISTRIBUIÇÃO SEMANAL:
+        - Alterne entre treinos intensos e leves
+        - Inclua apenas ${dias_treino} dias de treino por semana
+        - Distribua os treinos considerando a recuperação adequada
+        - Mantenha os outros dias como descanso estrategicamente posicionados
+
+        IMPORTANTE:
+        - Mostre a progressão dia a dia até atingir 21 km
+        - O treino longo do último fim de semana deve ser de 21 km com ritmo entre 6:00-6:30 min/km
+        - Alterne intensidades
+        - Inclua períodos de recuperação
+        - SEMPRE especifique ritmos em min/km como valores numéricos
+        - INCLUA TODOS OS 60 DIAS no plano, mesmo os dias de descanso
+        - NÃO ABREVIE O PLANO! Mostre todos os dias de todas as semanas.
+        - NÃO USE "..." ou "Semana 2-8" como abreviação. Detalhe cada dia de cada semana.
+        
+        DATAS PARA OS PRÓXIMOS 60 DIAS:
+        ${datas_formatadas}
+        
+        Responda em português do Brasil, formatando o plano de forma clara e organizada.
+        """)
+
+# Planos já gerados, indexados pelo hash do perfil do atleta (ver _chave_plano)
+CACHE_PLANOS_DIR = os.path.join(".cache", "plans")
+# Formato do texto guardado por cada caminho (entra na chave: um caminho não serve o plano do outro)
+FORMATO_PLANO_PARTES = "partes_json"  # gerar_plano: texto renderizado das duas metades em JSON
+FORMATO_PLANO_STREAM = "stream"  # gerar_plano_stream: resposta livre de uma única chamada
+
+# Campos do resumo usados na chave do cache de planos e a largura de cada faixa
+FAIXAS_PERFIL = (
+    ("media_pace", 0.25),  # min/km
+    ("media_fc", 5),  # bpm
+    ("max_dist_segura", 1),  # km
+)
+
+# Colunas lidas por analisar_dados (a chave do cache de resumos depende só delas)
+COLUNAS_ANALISE = ("startTimeLocal", "distancia_km", "duracao_minutos", "pace_min_km", "averageHR")
+MAX_RESUMOS_CACHE = 8
+# Treinos extraídos guardados (cada plano gerado ocupa duas entradas: texto bruto e formatado)
+MAX_TREINOS_CACHE = 8
+
+# Campos numéricos do resumo de analisar_dados e suas casas decimais
+CASAS_RESUMO = (
+    ("media_distancia", 2),
+    ("max_distancia", 2),
+    ("media_duracao", 0),
+    ("media_pace", 2),
+    ("media_fc", 0),
+    ("volume_semanal", 2),
+    ("melhora_pace", 2),
+    ("max_dist_segura", 1),
+)
+CAMPOS_RESUMO = tuple(campo for campo, _ in CASAS_RESUMO)
+ESCALA_RESUMO = 10.0 ** np.array([casas for _, casas in CASAS_RESUMO])
+
+# Separadores de linha Unicode trocados por quebras de linha comuns
+SEPARADORES_LINHA = str.maketrans({"\u2028": "\n", "\u2029": "\n"})
+
+# Ritmo indefinido ("inf") no texto do plano; só a palavra isolada, não "informação" ou "inferior"
+RITMO_INF_REGEX = re.compile(r"\binf\b")
+# Palavra incompleta no fim de um trecho transmitido (pode continuar no trecho seguinte)
+FIM_PALAVRA_REGEX = re.compile(r"\w*\Z")
+
+# Cabeçalho e rodapé que formatar_plano coloca em volta do texto do plano
+CABECALHO_PLANO = """
+            # 🏃‍♂️ Seu Plano de Treino Personalizado
+
+            """
+RODAPE_PLANO = """
+
+            ## 📝 Observações Importantes
+            - Sempre faça aquecimento antes e alongamento depois
+            - Hidrate-se bem antes, durante e após os treinos
+            - Escute seu corpo e ajuste as intensidades conforme necessário
+            - Em caso de dor ou desconforto, interrompa o treino
+
+            ## 🎯 Próximos Passos
+            1. Salve este plano
+            2. Comece os treinos gradualmente
+            3. Monitore seu progresso
+            4. Ajuste conforme necessário
+
+            Boa sorte em seus treinos! 💪
+            """
+
+# Dias da semana em português, com segunda-feira = 0
+DIAS_SEMANA = np.array([
+    "Segunda-feira", "Terça-feira", "Quarta-feira", "Quinta-feira",
+    "Sexta-feira", "Sábado", "Domingo"
+])
+
+# Padrões para extrair os treinos do texto do plano
+# Datas de um período ("27/05/2025 a 01/06/2025", no título da semana) não iniciam um dia
+DATA_TREINO_REGEX = re.compile(r"(?<!\sa\s)\b\d{2}/\d{2}/\d{4}\b(?!\s+a\s+\d{2}/\d{2}/\d{4})")
+TIPO_TREINO_REGEX = re.compile(r"Tipo[^:\n]*:\s*([^\n]+)", re.IGNORECASE)
+# Primeira linha de detalhes do dia; o tipo vem antes dela (depois dela, "Ritmo alvo" casaria com "ritmo")
+DETALHE_TREINO_REGEX = re.compile(
+    r"^[\s*#-]*(?:Distância|Duração|Ritmo alvo|Ritmo:|Zonas? FC|Justificativa|Dicas)",
+    re.IGNORECASE | re.MULTILINE
+)
+DISTANCIA_REGEX = re.compile(r"(\d+(?:[.,]\d+)?)\s*km\b", re.IGNORECASE)
+DURACAO_REGEX = re.compile(r"(\d+)\s*min\b(?!/)", re.IGNORECASE)
+RITMO_REGEX = re.compile(r"(\d{1,2}):(\d{2})(?:\s*-\s*(\d{1,2}):(\d{2}))?\s*min/km")
+
+# Palavra-chave -> tipo de treino (na ordem em que são testadas)
+TIPOS_TREINO = (
+    ("descanso", "Descanso"),
+    ("regenerativ", "Regenerativo"),
+    ("intervalad", "Intervalado"),
+    ("fartlek", "Fartlek"),
+    ("longo", "Longo"),
+    ("subida", "Subidas"),
+    ("ritmo", "Ritmo"),
+    ("base", "Base"),
+    ("contínuo", "Contínuo"),
+)
+
+# Template do TCX (aquecimento de 10 min, treino principal por distância e desaquecimento de 5 min)
+TCX_INICIO = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">'
+    "<Workouts>"
+)
+TCX_TREINO = (
+    '<Workout Sport="Running"><Name>{nome}</Name><Steps>'
+    '<Step Type="Warmup"><Duration Type="Time">600</Duration></Step>'
+    '<Step Type="Run"><Duration Type="Distance">{metros}</Duration>'
+    '<Target Type="Speed"><Zone><SpeedHigh>{velocidade}</SpeedHigh></Zone></Target></Step>'
+    '<Step Type="Cooldown"><Duration Type="Time">300</Duration></Step>'
+    "</Steps></Workout>"
+)
+TCX_FIM = "</Workouts></TrainingCenterDatabase>"
+
+# Em gerar_plano o plano é gerado em duas partes para evitar truncamento na resposta
+# (cada instrução é enviada como uma mensagem após o prompt completo)
+PARTES_PLANO = (
+    "Gere o plano detalhado para as primeiras 4 semanas (28 dias).",
+    "Gere o plano detalhado para as últimas 4 semanas (32 dias restantes).",
+)
+
+# Em gerar_plano cada parte vem como JSON estruturado, dispensando a extração por regex nos exportadores
+INSTRUCAO_JSON = (
+    'Responda somente com um objeto JSON no formato {"treinos": [{"data": "DD/MM/AAAA", '
+    '"dia_semana": "Segunda-feira", "tipo": "Treino Longo", "distancia_km": 10.0, "duracao_min": 60, '
+    '"ritmo_min_km": 6.0, "zona_fc": "Z2", "observacoes": "..."}]}, com um item por dia. '
+    'Dias de descanso têm tipo "Descanso" e valores numéricos 0. O ritmo é em minutos decimais '
+    '(5.5 = 5:30 min/km). Em "observacoes", resuma em uma frase a justificativa e as dicas do treino.'
+)
+
+# Em gerar_plano_stream os 60 dias saem de uma única chamada, com mais tokens de saída
+INSTRUCAO_PLANO_COMPLETO = "Gere o plano detalhado para todos os 60 dias, sem omitir nenhum dia."
+MAX_TOKENS_PLANO_COMPLETO = 8000
+
+# Modelo e parâmetros de geração dos planos
+MODELO_PLANO = "gpt-4o-mini"
+MAX_TOKENS_PLANO = 6000
+TEMPERATURA_PLANO = 0.5
+TOP_P_PLANO = 0.9
+
+def _media(valores):
+    """Média ignorando NaN (NaN se não houver valores)"""
+    valores = valores[~np.isnan(valores)]
+    return valores.mean() if len(valores) else np.nan
+
+def _limpar_plano(texto):
+    """Remove caracteres especiais problemáticos e troca ritmos 'inf' por 6:00"""
+    return RITMO_INF_REGEX.sub('6:00', texto.translate(SEPARADORES_LINHA))
+
+def _executar_async(corrotina):
+    """Executa a corrotina até o fim, mesmo se chamada de dentro de um loop de eventos em execução"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrotina)
+    # Jupyter e servidores assíncronos já têm um loop nesta thread: roda em um loop próprio em outra thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, corrotina).result()
+
+@functools.lru_cache(maxsize=1)
+def _carregar_env():
+    """Carrega as variáveis de ambiente do .env uma única vez"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+@functools.lru_cache(maxsize=1)
+def _prompt_sistema():
+    """ChatPromptTemplate do sistema, criado uma única vez e compartilhado entre instâncias"""
+    from langchain.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(TEMPLATE_SISTEMA)
+
+class TrainingAI:
+    def __init__(self):
+        # Carrega variáveis de ambiente
+        _carregar_env()
+        
+        # Treinos já extraídos, por hash do texto do plano
+        self._treinos_cache = {}
+        
+        # Resumos já calculados, por hash do conteúdo do DataFrame
+        self._resumo_cache = {}
+    
+    @functools.cached_property
+    def llm(self):
+        """LLM do LangChain, criada no primeiro acesso"""
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model_name=MODELO_PLANO,
+            temperature=TEMPERATURA_PLANO,
+            api_key=os.getenv("OPENAI_API_KEY")
+        )
+    
+    @functools.cached_property
+    def prompt(self):
+        """Template do sistema"""
+        return _prompt_sistema()
 
     def analisar_dados(self, df):
         """Análise detalhada dos dados do Garmin"""
         try:
-            # Remove valores inválidos de pace
-            df = df[df['pace_min_km'].notna() & (df['pace_min_km'] > 0) & (df['pace_min_km'] < 15)]
-            
-            # Cálculos básicos
-            media_distancia = df["distancia_km"].mean()
-            max_distancia = df["distancia_km"].max()
-            media_duracao = df["duracao_minutos"].mean()
-            media_pace = df["pace_min_km"].mean()
-            media_fc = df["averageHR"].mean() if "averageHR" in df.columns else 0
-            
-            # Análises adicionais
-            volume_semanal = df.groupby(pd.Grouper(key='startTimeLocal', freq='W'))['distancia_km'].sum().mean()
-            tendencia_pace = df.sort_values('startTimeLocal')['pace_min_km'].tolist()
-            melhora_pace = tendencia_pace[0] - tendencia_pace[-1] if len(tendencia_pace) > 1 else 0
+            # Os mesmos dados (ex.: ao mudar só objetivo, nível ou dias) reaproveitam o resumo
+            chave = self._chave_dados(df)
+            if chave in self._resumo_cache:
+                return dict(self._resumo_cache[chave])
+            
+            # Extrai as colunas uma vez como arrays; o restante é feito em NumPy, sem o overhead do pandas
+            pace = df['pace_min_km'].to_numpy(dtype=np.float64)
+            
+            # Remove valores inválidos de pace (NaN falha nas duas comparações)
+            validos = (pace > 0) & (pace < 15)
+            pace = pace[validos]
+            datas = df['startTimeLocal']
+            if datas.dt.tz is not None:
+                # Datas com fuso viram hora local sem fuso, como no agrupamento semanal do pandas
+                datas = datas.dt.tz_localize(None)
+            datas = datas.to_numpy()[validos]
+            distancias = df['distancia_km'].to_numpy(dtype=np.float64)[validos]
+            duracoes = df['duracao_minutos'].to_numpy(dtype=np.float64)[validos]
+            fcs = df['averageHR'].to_numpy(dtype=np.float64)[validos] if "averageHR" in df.columns else None
+            
+            # Treinos sem data (NaT) ficam fora do período e do volume semanal, como no pandas
+            com_data = ~np.isnat(datas)
+            posicoes = np.flatnonzero(com_data)
+            datas_validas = datas[com_data]
+            
+            # Primeiro e último treino por posição, sem ordenar (como no sort_values, os sem data vêm por último)
+            i_inicio = posicoes[datas_validas.argmin()]
+            i_fim = posicoes[datas_validas.argmax()] if com_data.all() else np.flatnonzero(~com_data)[-1]
+            melhora_pace = pace[i_inicio] - pace[i_fim] if len(pace) > 1 else 0
+            
+            # Cálculos básicos (ignorando valores faltantes, como o pandas)
+            media_distancia = _media(distancias)
+            max_distancia = np.nanmax(distancias) if not np.isnan(distancias).all() else np.nan
+            media_duracao = _media(duracoes)
+            media_pace = pace.mean()
+            media_fc = _media(fcs) if fcs is not None else 0
+            
+            # Volume semanal: total dividido pelo número de semanas (segunda a domingo) do período,
+            # contando semanas sem treino, como no agrupamento semanal do pandas
+            semanas = (datas_validas.astype('datetime64[D]').astype(np.int64) + 3) // 7
+            volume_semanal = np.nansum(distancias[com_data]) / (semanas.max() - semanas.min() + 1)
             
             # Cálculo de distância segura (máx histórico + 10%)
-            max_dist_segura = round(max_distancia * 1.1, 1)
-            
-            resumo = {
-                "media_distancia": round(media_distancia, 2),
-                "max_distancia": round(max_distancia, 2),
-                "media_duracao": round(media_duracao, 0),
-                "media_pace": round(media_pace, 2),
-                "media_fc": round(media_fc, 0),
-                "volume_semanal": round(volume_semanal, 2),
-                "melhora_pace": round(melhora_pace, 2),
-                "max_dist_segura": max_dist_segura,
-                "total_atividades": len(df),
-                "periodo_dados": f"{df['startTimeLocal'].min().date()} a {df['startTimeLocal'].max().date()}"
-            }
+            max_dist_segura = max_distancia * 1.1
+            
+            # Arredonda todos os valores de uma vez, na ordem de CASAS_RESUMO
+            valores = np.array([
+                media_distancia, max_distancia, media_duracao, media_pace,
+                media_fc, volume_semanal, melhora_pace, max_dist_segura
+            ], dtype=np.float64)
+            arredondados = np.round(valores * ESCALA_RESUMO) / ESCALA_RESUMO
+            
+            resumo = dict(zip(CAMPOS_RESUMO, arredondados.tolist()))
+            resumo["total_atividades"] = len(pace)
+            resumo["periodo_dados"] = f"{np.datetime_as_string(datas_validas.min(), unit='D')} a {np.datetime_as_string(datas_validas.max(), unit='D')}"
+            
+            if len(self._resumo_cache) >= MAX_RESUMOS_CACHE:
+                self._resumo_cache.pop(next(iter(self._resumo_cache)))
+            self._resumo_cache[chave] = dict(resumo)
             return resumo
         except Exception as e:
             print(f"Erro ao analisar dados: {str(e)}")
             return None
+    
+    def _chave_dados(self, df):
+        """Hash do conteúdo das colunas usadas em analisar_dados"""
+        import pandas as pd
+        
+        colunas = [c for c in COLUNAS_ANALISE if c in df.columns]
+        hashes = pd.util.hash_pandas_object(df[colunas], index=False).to_numpy()
+        chave = hashlib.blake2b(",".join(colunas).encode("utf-8"), digest_size=16)
+        chave.update(hashes.tobytes())
+        return chave.hexdigest()
+    
+    def montar_prompt(self, resumo, objetivo, nivel, dias_treino, feedback=None, hoje=None):
+        """Monta o prompt do plano de 60 dias a partir do resumo dos dados do atleta"""
+        dados_resumidos = f"""
+        HISTÓRICO DE TREINO:
+        - Média de distância: {resumo['media_distancia']:.2f} km por treino
+        - Distância máxima: {resumo['max_distancia']:.2f} km
+        - Volume semanal médio: {resumo['volume_semanal']:.2f} km
+        - Duração média: {resumo['media_duracao']:.0f} min
+        - Pace médio atual: {resumo['media_pace']:.2f} min/km
+        - Evolução do pace: {resumo['melhora_pace']:.2f} min/km
+        - FC média: {resumo['media_fc']:.0f} bpm
+        - Total de atividades: {resumo['total_atividades']}
+        - Período analisado: {resumo['periodo_dados']}
+        """
+
+        if feedback and isinstance(feedback, dict):
+            dados_resumidos += f"""
+            FEEDBACK DO USUÁRIO:
+            - Tipo: {feedback.get('tipo', 'Não especificado')}
+            - Nível de Impacto: {feedback.get('nivel', 'Não especificado')}
+            - Detalhes: {feedback.get('detalhes', 'Não especificado')}
+            - Preferências: {', '.join(feedback.get('preferencias', ['Não especificado']))}
+            """
+        
+        # Gera datas para os próximos 60 dias
+        datas = np.datetime64(hoje or datetime.now().date(), 'D') + np.arange(60)
+        # 01/01/1970 (dia 0) foi uma quinta-feira, índice 3 com segunda-feira = 0
+        dias_semana = DIAS_SEMANA[(datas.astype(np.int64) + 3) % 7]
+        datas_iso = np.datetime_as_string(datas, unit='D')
+        
+        # Adiciona as datas ao prompt (AAAA-MM-DD -> DD/MM/AAAA)
+        datas_formatadas = ", ".join(
+            f"{d[8:10]}/{d[5:7]}/{d[:4]} ({dia})" for d, dia in zip(datas_iso, dias_semana)
+        )
+        
+        # Cria um prompt específico para plano completo de 60 dias
+        prompt_completo = PROMPT_PLANO.substitute(
+            dados_resumidos=dados_resumidos,
+            objetivo=objetivo,
+            nivel=nivel,
+            dias_treino=dias_treino,
+            pace_medio=f"{resumo['media_pace']:.2f}",
+            fc_media=f"{resumo['media_fc']:.0f}",
+            datas_formatadas=datas_formatadas
+        )
+        
+        return prompt_completo
+    
     def gerar_plano(self, df, objetivo, nivel, dias_treino, feedback=None):
         """Gera um plano de treino personalizado"""
         try:
             resumo = self.analisar_dados(df)
             if not resumo:
                 return "Erro ao analisar dados de treino. Por favor, tente novamente."
-
-            dados_resumidos = f"""
-            HISTÓRICO DE TREINO:
-            - Média de distância: {resumo['media_distancia']:.2f} km por treino
-            - Distância máxima: {resumo['max_distancia']:.2f} km
-            - Volume semanal médio: {resumo['volume_semanal']:.2f} km
-            - Duração média: {resumo['media_duracao']:.0f} min
-            - Pace médio atual: {resumo['media_pace']:.2f} min/km
-            - Evolução do pace: {resumo['melhora_pace']:.2f} min/km
-            - FC média: {resumo['media_fc']:.0f} bpm
-            - Total de atividades: {resumo['total_atividades']}
-            - Período analisado: {resumo['periodo_dados']}
-            """
-
-            if feedback and isinstance(feedback, dict):
-                dados_resumidos += f"""
-                FEEDBACK DO USUÁRIO:
-                - Tipo: {feedback.get('tipo', 'Não especificado')}
-                - Nível de Impacto: {feedback.get('nivel', 'Não especificado')}
-                - Detalhes: {feedback.get('detalhes', 'Não especificado')}
-                - Preferências: {', '.join(feedback.get('preferencias', ['Não especificado']))}
-                """
-            
-            # Gera datas para os próximos 60 dias
-            hoje = datetime.now()
-            datas = [(hoje + timedelta(days=i)).strftime("%d/%m/%Y") for i in range(60)]
-            dias_semana = [(hoje + timedelta(days=i)).strftime("%A") for i in range(60)]
-            dias_semana = [self.traduzir_dia(dia) for dia in dias_semana]
-            
-            # Adiciona as datas ao prompt
-            datas_formatadas = ", ".join([f"{datas[i]} ({dias_semana[i]})" for i in range(60)])
-            
-            # Cria um prompt específico para plano completo de 60 dias
-            prompt_completo = f"""
-            Você é um treinador expert em corrida, especializado em análise de dados e prescrição de treinos.
-            
-            DADOS DO ATLETA:
-            {dados_resumidos}
-
-            OBJETIVO DO ATLETA:
-            {objetivo}
-
-            PERFIL:
-            - Nível: {nivel}
-            - Dias disponíveis: {dias_treino} dias/semana
-
-            DIRETRIZES PARA O PLANO:
-            1. Baseie a progressão nos dados históricos
-            2. Mantenha pelo menos 1 dia de recuperação entre treinos intensos
-            3. Use o pace médio atual de {resumo['media_pace']:.2f} min/km como referência
-            4. Use a FC média de {resumo['media_fc']:.0f} bpm como referência
-            5. Especifique SEMPRE ritmos em min/km como valores numéricos (exemplo: 5:30-6:00 min/km)
-            6. NUNCA use 'inf' ou valores indefinidos para ritmos
-            7. IMPORTANTE: Crie um plano COMPLETO para os próximos 60 dias (2 meses) com datas específicas
-            8. Organize os treinos DIA A DIA com datas exatas
-            9. Inclua pelo menos um treino longo por semana, aumentando gradualmente até chegar a 21 km no final do período
-
-            TIPOS DE TREINO A INCLUIR (distribua ao longo da semana):
-            1. Treino Regenerativo/Leve (recuperação ativa)
-            2. Treino Base/Contínuo (volume)
-            3. Treino Intervalado (velocidade)
-            4. Treino Longo (resistência)
-            5. Treino de Ritmo (pace específico)
-            6. Fartlek (variações de ritmo)
-            7. Subidas (quando apropriado)
-            8. Dias de Descanso
-
-            ESTRUTURA DO PLANO:
-            Para cada dia, especifique:
-            1. Data exata (DD/MM/AAAA)
-            2. Dia da semana (Segunda, Terça, etc.)
-            3. Tipo de treino (use a variedade acima) ou "Descanso"
-            4. Para dias de treino: Distância, duração, ritmo alvo, zonas FC, justificativa e dicas
-            5. Para dias de descanso: apenas indique "Descanso" e uma breve justificativa
-
-            DISTRIBUIÇÃO SEMANAL:
-            - Alterne entre treinos intensos e leves
-            - Inclua apenas {dias_treino} dias de treino por semana
-            - Distribua os treinos considerando a recuperação adequada
-            - Mantenha os outros dias como descanso estrategicamente posicionados
-
-            IMPORTANTE:
-            - Mostre a progressão dia a dia até atingir 21 km
-            - O treino longo do último fim de semana deve ser de 21 km com ritmo entre 6:00-6:30 min/km
-            - Alterne intensidades
-            - Inclua períodos de recuperação
-            - SEMPRE especifique ritmos em min/km como valores numéricos
-            - INCLUA TODOS OS 60 DIAS no plano, mesmo os dias de descanso
-            - NÃO ABREVIE O PLANO! Mostre todos os dias de todas as semanas.
-            - NÃO USE "..." ou "Semana 2-8" como abreviação. Detalhe cada dia de cada semana.
-            
-            DATAS PARA OS PRÓXIMOS 60 DIAS:
-            {datas_formatadas}
-            
-            Responda em português do Brasil, formatando o plano de forma clara e organizada.
-            """
-            
-            # Divide o prompt em partes para processar separadamente
-            # Isso ajuda a evitar truncamento na resposta
             
-            # Parte 1: Gerar plano para as primeiras 4 semanas
-            prompt_parte1 = prompt_completo + "\n\nGere o plano detalhado para as primeiras 4 semanas (28 dias)."
-            
-            # Parte 2: Gerar plano para as últimas 4 semanas
-            prompt_parte2 = prompt_completo + "\n\nGere o plano detalhado para as últimas 4 semanas (32 dias restantes)."
-            
-            # Usa a API diretamente para evitar truncamento
-            import os
-            import openai
-            from dotenv import load_dotenv
-            
-            # Carrega variáveis de ambiente
-            load_dotenv()
-            
-            # Configura a API da OpenAI
-            openai.api_key = os.getenv("OPENAI_API_KEY")
-            
-            # Faz a chamada para a API - Parte 1
-            print("Gerando plano para as primeiras 4 semanas...")
-            response1 = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Você é um treinador expert em corrida."},
-                    {"role": "user", "content": prompt_parte1}
-                ],
-                max_tokens=4000,
-                temperature=0.7
-            )
-            
-            # Faz a chamada para a API - Parte 2
-            print("Gerando plano para as últimas 4 semanas...")
-            response2 = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Você é um treinador expert em corrida."},
-                    {"role": "user", "content": prompt_parte2}
-                ],
-                max_tokens=4000,
-                temperature=0.7
-            )
-            
-            # Extrai os planos
-            plano_parte1 = response1.choices[0].message.content
-            plano_parte2 = response2.choices[0].message.content
-            
-            # Combina os planos
-            plano_texto = f"""**PLANO DE TREINAMENTO PARA MEIA MARATONA - 60 DIAS**
-
-{plano_parte1}
-
-{plano_parte2}
-"""
+            # Reaproveita um plano já gerado para um perfil equivalente no mesmo dia
+            # Uma única data de referência para a chave do cache e as datas do prompt
+            hoje = datetime.now().date()
+            chave = self._chave_plano(resumo, objetivo, nivel, dias_treino, feedback, hoje, FORMATO_PLANO_PARTES)
+            plano_texto = self._ler_plano_cache(chave)
+            if plano_texto is None:
+                prompt_completo = self.montar_prompt(resumo, objetivo, nivel, dias_treino, feedback, hoje)
+                
+                # Divide o plano em partes para processar separadamente
+                # Isso ajuda a evitar truncamento na resposta
+                # A instrução de cada parte vai em uma mensagem própria: o prompt completo
+                # fica idêntico nas duas chamadas e seu prefixo é reaproveitado pelo cache da OpenAI
+                
+                # As duas partes são independentes: faz as chamadas em paralelo
+                print("Gerando plano para as primeiras e as últimas 4 semanas...")
+                response1, response2 = _executar_async(self._gerar_partes(prompt_completo))
+                
+                # Extrai os treinos das duas partes
+                treinos = []
+                for response in (response1, response2):
+                    treinos.extend(orjson.loads(response.choices[0].message.content)["treinos"])
+                
+                # Monta o texto do plano a partir dos mesmos treinos
+                plano_texto = (
+                    "**PLANO DE TREINAMENTO PARA MEIA MARATONA - 60 DIAS**\n\n"
+                    + self.renderizar_treinos(treinos)
+                )
+                
+                # Os exportadores recebem os treinos já estruturados, sem reextrair do texto
+                colunas = self._treinos_em_colunas(treinos)
+                self._guardar_treinos(self._chave_treinos(plano_texto), colunas)
+                self._salvar_plano_cache(chave, plano_texto)
             
             # Salva o plano em um arquivo
             with open("plano_completo_meia_maratona.txt", "w", encoding="utf-8") as f:
@@ -287,7 +506,11 @@ class TrainingAI:
             
             print(f"✅ Plano salvo em 'plano_completo_meia_maratona.txt'")
             
-            return self.formatar_plano(plano_texto)
+            plano_formatado = self.formatar_plano(plano_texto)
+            colunas = self._treinos_cache.get(self._chave_treinos(plano_texto))
+            if colunas is not None:
+                self._guardar_treinos(self._chave_treinos(plano_formatado), colunas)
+            return plano_formatado
             
         except Exception as e:
             print(f"Erro ao gerar plano: {str(e)}")
@@ -295,6 +518,134 @@ class TrainingAI:
             print(traceback.format_exc())
             return None
     
+    def gerar_plano_stream(self, df, objetivo, nivel, dias_treino, feedback=None):
+        """Gera o plano de treino produzindo o texto à medida que chega da API"""
+        resumo = self.analisar_dados(df)
+        if not resumo:
+            # Erros são levantados, e não produzidos como texto, para não serem exibidos como plano
+            raise ValueError("Erro ao analisar dados de treino. Por favor, tente novamente.")
+        
+        hoje = datetime.now().date()
+        chave = self._chave_plano(resumo, objetivo, nivel, dias_treino, feedback, hoje, FORMATO_PLANO_STREAM)
+        plano_cache = self._ler_plano_cache(chave)
+        if plano_cache is not None:
+            yield self.formatar_plano(plano_cache)
+            return
+        
+        prompt_completo = self.montar_prompt(resumo, objetivo, nivel, dias_treino, feedback, hoje)
+        
+        import openai
+        
+        # Configura a API da OpenAI
+        openai.api_key = os.getenv("OPENAI_API_KEY")
+        
+        print("Gerando plano para os 60 dias...")
+        resposta = self._chamar_api(
+            openai, prompt_completo, INSTRUCAO_PLANO_COMPLETO, stream=True,
+            max_tokens=MAX_TOKENS_PLANO_COMPLETO
+        )
+        
+        # Escreve o plano no arquivo à medida que é gerado; a tela recebe o mesmo texto
+        # que formatar_plano produziria, com cabeçalho, ritmos corrigidos e rodapé
+        yield CABECALHO_PLANO
+        partes = ["**PLANO DE TREINAMENTO PARA MEIA MARATONA - 60 DIAS**\n\n"]
+        with open("plano_completo_meia_maratona.txt", "w", encoding="utf-8") as f:
+            f.write(partes[0])
+            yield partes[0]
+            
+            # A palavra no fim de cada trecho fica retida até o próximo ("in" + "f")
+            pendente = ""
+            for chunk in resposta:
+                texto = chunk.choices[0].delta.content if chunk.choices else None
+                if texto:
+                    partes.append(texto)
+                    f.write(texto)
+                    f.flush()
+                    pendente += texto
+                    corte = FIM_PALAVRA_REGEX.search(pendente).start()
+                    if corte:
+                        yield _limpar_plano(pendente[:corte])
+                        pendente = pendente[corte:]
+            
+            f.write("\n")
+            yield _limpar_plano(pendente + "\n")
+        
+        self._salvar_plano_cache(chave, "".join(partes) + "\n")
+        yield RODAPE_PLANO
+        
+        print(f"✅ Plano salvo em 'plano_completo_meia_maratona.txt'")
+    
+    def _chave_plano(self, resumo, objetivo, nivel, dias_treino, feedback=None, hoje=None,
+                     formato=FORMATO_PLANO_PARTES):
+        """Chave do cache de planos: perfil em faixas, objetivo, nível, dias, feedback, data de hoje e formato"""
+        # Uma atividade nova quase não muda as médias; em faixas, o perfil continua o mesmo
+        perfil = [int(np.nan_to_num(resumo[campo]) // faixa) for campo, faixa in FAIXAS_PERFIL]
+        dados = orjson.dumps(
+            [perfil, objetivo, nivel, dias_treino, feedback or {}, hoje or datetime.now().date(), formato],
+            option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.blake2b(dados, digest_size=16).hexdigest()
+    
+    def _caminho_plano_cache(self, chave):
+        """Caminho do arquivo de cache para a chave"""
+        return os.path.join(CACHE_PLANOS_DIR, f"{chave}.txt")
+    
+    def _ler_plano_cache(self, chave):
+        """Lê um plano já gerado para a mesma chave, se existir"""
+        caminho = self._caminho_plano_cache(chave)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                print("✅ Plano recuperado do cache")
+                return f.read()
+        except Exception as e:
+            print(f"⚠️ Erro ao ler o cache de planos: {str(e)}")
+            return None
+    
+    def _salvar_plano_cache(self, chave, plano_texto):
+        """Salva o plano gerado em disco para reaproveitá-lo"""
+        try:
+            os.makedirs(CACHE_PLANOS_DIR, exist_ok=True)
+            with open(self._caminho_plano_cache(chave), "w", encoding="utf-8") as f:
+                f.write(plano_texto)
+        except Exception as e:
+            print(f"⚠️ Não foi possível salvar o cache de planos: {str(e)}")
+    
+    async def _gerar_partes(self, prompt_completo):
+        """Gera as partes do plano em paralelo, multiplexadas em uma conexão HTTP/2"""
+        # Usa a API diretamente para evitar truncamento
+        import httpx
+        from openai import AsyncOpenAI
+        
+        async with httpx.AsyncClient(
+            http2=True, limits=httpx.Limits(max_keepalive_connections=4)
+        ) as http_client:
+            cliente = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+            return await asyncio.gather(*(
+                self._chamar_api(cliente, prompt_completo, f"{instrucao} {INSTRUCAO_JSON}", formato_json=True)
+                for instrucao in PARTES_PLANO
+            ))
+    
+    def _chamar_api(self, cliente, prompt, instrucao, stream=False, max_tokens=MAX_TOKENS_PLANO,
+                    formato_json=False):
+        """Faz uma chamada de chat completion para o plano (ou uma parte dele)"""
+        # Com um cliente assíncrono, devolve a corrotina da chamada
+        extras = {"response_format": {"type": "json_object"}} if formato_json else {}
+        return cliente.chat.completions.create(
+            model=MODELO_PLANO,
+            messages=[
+                {"role": "system", "content": "Você é um treinador expert em corrida."},
+                {"role": "user", "content": prompt},
+                {"role": "user", "content": instrucao}
+            ],
+            max_tokens=max_tokens,
+            temperature=TEMPERATURA_PLANO,
+            top_p=TOP_P_PLANO,
+            stream=stream,
+            **extras
+        )
+    
     def traduzir_dia(self, dia_en):
         """Traduz o nome do dia da semana de inglês para português"""
         traducao = {
@@ -311,37 +662,116 @@ class TrainingAI:
     def formatar_plano(self, plano_texto):
         """Formata o plano de treino para melhor visualização"""
         try:
-            # Remove caracteres especiais problemáticos
-            plano_texto = plano_texto.replace('\u2028', '\n').replace('\u2029', '\n')
-            
-            # Verifica e corrige possíveis valores 'inf' no texto
-            plano_texto = plano_texto.replace('inf min/km', '6:00 min/km')
-            plano_texto = plano_texto.replace('inf', '6:00')
-            
-            plano_formatado = f"""
-            # 🏃‍♂️ Seu Plano de Treino Personalizado
-
-            {plano_texto}
-
-            ## 📝 Observações Importantes
-            - Sempre faça aquecimento antes e alongamento depois
-            - Hidrate-se bem antes, durante e após os treinos
-            - Escute seu corpo e ajuste as intensidades conforme necessário
-            - Em caso de dor ou desconforto, interrompa o treino
-
-            ## 🎯 Próximos Passos
-            1. Salve este plano
-            2. Comece os treinos gradualmente
-            3. Monitore seu progresso
-            4. Ajuste conforme necessário
-
-            Boa sorte em seus treinos! 💪
-            """
-            return plano_formatado
+            # Corrige possíveis valores 'inf' ("inf min/km" vira "6:00 min/km")
+            return CABECALHO_PLANO + _limpar_plano(plano_texto) + RODAPE_PLANO
         except Exception as e:
             print(f"Erro ao formatar plano: {str(e)}")
             return plano_texto
 
+    def extrair_treinos(self, plano_texto):
+        """Extrai os treinos do plano em colunas (tipo, distancia, duracao, ritmo, observacoes)"""
+        chave = self._chave_treinos(plano_texto)
+        if chave in self._treinos_cache:
+            return self._treinos_cache[chave]
+        
+        # Cada data (DD/MM/AAAA) inicia o bloco de um dia do plano
+        inicios = [m.start() for m in DATA_TREINO_REGEX.finditer(plano_texto)]
+        blocos = [plano_texto[a:b] for a, b in zip(inicios, inicios[1:] + [len(plano_texto)])]
+        
+        tipos, observacoes = [], []
+        for bloco in blocos:
+            # Sem linha "Tipo", o tipo vem das linhas entre a data e os detalhes do dia
+            # (na própria linha da data ou em uma linha seguinte, após o dia da semana)
+            tipo_linha = TIPO_TREINO_REGEX.search(bloco)
+            if tipo_linha:
+                texto_tipo = tipo_linha.group(1).lower()
+            else:
+                detalhe = DETALHE_TREINO_REGEX.search(bloco)
+                texto_tipo = bloco[:detalhe.start() if detalhe else len(bloco)].lower()
+            tipos.append(next((tipo for chave_tipo, tipo in TIPOS_TREINO if chave_tipo in texto_tipo), "Treino"))
+            observacoes.append(bloco.strip("*#-_ \n"))
+        
+        treinos = {
+            "tipo": np.array(tipos, dtype=str),
+            "distancia": np.fromiter((self._extrair_distancia(b) for b in blocos), dtype=np.float64, count=len(blocos)),
+            "duracao": np.fromiter((self._extrair_duracao(b) for b in blocos), dtype=np.float64, count=len(blocos)),
+            "ritmo": np.fromiter((self._extrair_ritmo(b) for b in blocos), dtype=np.float64, count=len(blocos)),
+            "observacoes": observacoes,
+        }
+        self._guardar_treinos(chave, treinos)
+        return treinos
+    
+    def _chave_treinos(self, plano_texto):
+        """Chave do cache de treinos extraídos para o texto do plano"""
+        return hashlib.blake2b(plano_texto.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _guardar_treinos(self, chave, treinos):
+        """Guarda treinos extraídos, descartando os mais antigos acima de MAX_TREINOS_CACHE"""
+        if chave not in self._treinos_cache and len(self._treinos_cache) >= MAX_TREINOS_CACHE:
+            self._treinos_cache.pop(next(iter(self._treinos_cache)))
+        self._treinos_cache[chave] = treinos
+    
+    def _treinos_em_colunas(self, treinos):
+        """Converte a lista de treinos do JSON para as colunas usadas pelos exportadores"""
+        def numero(treino, campo):
+            valor = treino.get(campo)
+            return float(valor) if isinstance(valor, (int, float)) else np.nan
+        
+        return {
+            "tipo": np.array([str(t.get("tipo", "")) for t in treinos], dtype=str),
+            "distancia": np.fromiter((numero(t, "distancia_km") for t in treinos), dtype=np.float64, count=len(treinos)),
+            "duracao": np.fromiter((numero(t, "duracao_min") for t in treinos), dtype=np.float64, count=len(treinos)),
+            "ritmo": np.fromiter((numero(t, "ritmo_min_km") for t in treinos), dtype=np.float64, count=len(treinos)),
+            "observacoes": [str(t.get("observacoes", "")) for t in treinos],
+        }
+    
+    def renderizar_treinos(self, treinos):
+        """Texto legível do plano a partir da lista de treinos do JSON"""
+        linhas = []
+        for t in treinos:
+            cabecalho = f"**{t.get('data', '')} ({t.get('dia_semana', '')}) - {t.get('tipo', '')}**"
+            if str(t.get("tipo", "")).lower() == "descanso":
+                linhas.append(f"{cabecalho}\n- {t.get('observacoes', '')}\n")
+                continue
+            ritmo = float(t.get("ritmo_min_km") or 0)
+            minutos, segundos = divmod(round(ritmo * 60), 60)
+            linhas.append(
+                f"{cabecalho}\n"
+                f"- Distância: {float(t.get('distancia_km') or 0):.1f} km | "
+                f"Duração: {float(t.get('duracao_min') or 0):.0f} min | "
+                f"Ritmo: {minutos}:{segundos:02d} min/km | FC: {t.get('zona_fc', '')}\n"
+                f"- {t.get('observacoes', '')}\n"
+            )
+        return "\n".join(linhas)
+    
+    def _extrair_distancia(self, bloco):
+        """Primeira distância em km do bloco (NaN se não houver)"""
+        m = DISTANCIA_REGEX.search(bloco)
+        return float(m.group(1).replace(",", ".")) if m else np.nan
+    
+    def _extrair_duracao(self, bloco):
+        """Primeira duração em minutos do bloco (NaN se não houver)"""
+        m = DURACAO_REGEX.search(bloco)
+        return float(m.group(1)) if m else np.nan
+    
+    def _extrair_ritmo(self, bloco):
+        """Ritmo alvo em min/km decimais; faixas usam o ponto médio (NaN se não houver)"""
+        m = RITMO_REGEX.search(bloco)
+        if not m:
+            return np.nan
+        ritmo = int(m.group(1)) + int(m.group(2)) / 60
+        if m.group(3):
+            ritmo = (ritmo + int(m.group(3)) + int(m.group(4)) / 60) / 2
+        return ritmo
+    
+    def _normalizar_treinos(self, treinos):
+        """Distância, duração e ritmo dentro dos limites (faltantes recebem o padrão) e velocidade em m/s"""
+        distancias = np.clip(np.nan_to_num(treinos['distancia'], nan=5), 3, 42)
+        duracoes = np.clip(np.nan_to_num(treinos['duracao'], nan=30), 20, 240)
+        ritmos = np.clip(np.nan_to_num(treinos['ritmo'], nan=6), 4, 8)
+        velocidades = 1000 / (ritmos * 60)  # Converte min/km para m/s
+        return distancias, duracoes, ritmos, velocidades
+    
     def gerar_arquivo_treino(self, plano_texto, formato="pdf", sufixo=""):
         """Gera arquivos nos formatos solicitados"""
         try:
@@ -417,6 +847,8 @@ class TrainingAI:
     def gerar_pdf(self, plano_texto, filename):
         """Gera arquivo PDF do plano"""
         try:
+            from fpdf import FPDF
+            
             pdf = FPDF()
             pdf.add_page()
             
@@ -441,23 +873,18 @@ class TrainingAI:
             pdf.cell(0, 10, 'Visão Geral do Plano', 0, 1, 'L')
             pdf.ln(5)
             
-            # Tabela de treinos
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(20, 10, 'Dia', 1)
-            pdf.cell(40, 10, 'Tipo', 1)
-            pdf.cell(30, 10, 'Distância', 1)
-            pdf.cell(30, 10, 'Duração', 1)
-            pdf.cell(30, 10, 'Ritmo', 1)
-            pdf.ln()
-            
-            pdf.set_font('Arial', '', 10)
-            for i, treino in enumerate(treinos, 1):
-                pdf.cell(20, 10, f'Dia {i}', 1)
-                pdf.cell(40, 10, treino.get('tipo', ''), 1)
-                pdf.cell(30, 10, f"{treino.get('distancia', 0):.1f} km", 1)
-                pdf.cell(30, 10, f"{treino.get('duracao', 0):.0f} min", 1)
-                pdf.cell(30, 10, f"{treino.get('ritmo', 0):.2f} min/km", 1)
-                pdf.ln()
+            # Tabela de treinos: linhas pré-formatadas em fonte monoespaçada, desenhadas em um único bloco
+            distancias = np.nan_to_num(treinos['distancia'])
+            duracoes = np.nan_to_num(treinos['duracao'])
+            ritmos = np.nan_to_num(treinos['ritmo'])
+            linhas = [f"{'Dia':<8}{'Tipo':<16}{'Distância':>11}{'Duração':>10}{'Ritmo':>14}"]
+            linhas += [
+                f"{f'Dia {i}':<8}{tipo[:15]:<16}{distancia:>8.1f} km{duracao:>6.0f} min{ritmo:>7.2f} min/km"
+                for i, (tipo, distancia, duracao, ritmo) in enumerate(
+                    zip(treinos['tipo'], distancias, duracoes, ritmos), 1)
+            ]
+            pdf.set_font('Courier', '', 10)
+            pdf.multi_cell(0, 8, "\n".join(linhas))
             
             pdf.ln(10)
             
@@ -466,11 +893,11 @@ class TrainingAI:
             pdf.cell(0, 10, 'Detalhes dos Treinos', 0, 1, 'L')
             pdf.ln(5)
             
-            for i, treino in enumerate(treinos, 1):
+            for i, (tipo, observacoes) in enumerate(zip(treinos['tipo'], treinos['observacoes']), 1):
                 pdf.set_font('Arial', 'B', 12)
-                pdf.cell(0, 10, f"Dia {i} - {treino.get('tipo', '')}", 0, 1, 'L')
+                pdf.cell(0, 10, f"Dia {i} - {tipo}", 0, 1, 'L')
                 pdf.set_font('Arial', '', 10)
-                pdf.multi_cell(0, 10, treino.get('observacoes', ''))
+                pdf.multi_cell(0, 10, observacoes)
                 pdf.ln(5)
             
             # Rodapé com data de geração
@@ -492,60 +919,31 @@ class TrainingAI:
         try:
             treinos = self.extrair_treinos(plano_texto)
             
-            if not treinos:
+            if not len(treinos['tipo']):
                 print("Nenhum treino extraído para gerar CSV")
                 return None
             
-            # Cabeçalho padrão do Sisrun
-            headers = [
-                'Data',
-                'Tipo de Treino',
-                'Distância (km)',
-                'Duração (min)',
-                'Ritmo Médio (min/km)',
-                'Zona FC',
-                'Percurso',
-                'Observações'
-            ]
+            # Valida os valores numéricos de uma vez (faltantes recebem o padrão)
+            descanso = np.char.lower(treinos['tipo']) == 'descanso'
+            distancias, duracoes, ritmos, _ = self._normalizar_treinos(treinos)
+            
+            import pandas as pd
+            
+            # Colunas no formato padrão do Sisrun; dias de descanso têm valores fixos
+            n = len(descanso)
+            observacoes = np.array([obs[:100] for obs in treinos['observacoes']])  # Limita tamanho das observações
+            tabela = pd.DataFrame({
+                'Data': pd.date_range(datetime.now(), periods=n, freq='D').strftime('%d/%m/%Y'),
+                'Tipo de Treino': np.where(descanso, 'Descanso', treinos['tipo']),
+                'Distância (km)': np.where(descanso, '0', np.char.mod('%.1f', distancias)),
+                'Duração (min)': np.where(descanso, '0', np.char.mod('%.0f', duracoes)),
+                'Ritmo Médio (min/km)': np.where(descanso, '0', np.char.mod('%.2f', ritmos)),
+                'Zona FC': np.where(descanso, 'N/A', 'Z1-Z3'),  # Zona de FC padrão
+                'Percurso': np.where(descanso, 'N/A', 'Livre'),  # Percurso padrão
+                'Observações': np.where(descanso, 'Dia de recuperação', observacoes),
+            })
+            tabela.to_csv(filename, index=False, encoding='utf-8', lineterminator='\r\n')
             
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
-                
-                data = datetime.now()
-                for treino in treinos:
-                    # Trata dias de descanso
-                    if treino.get('tipo', '').lower() == 'descanso':
-                        row = [
-                            data.strftime('%d/%m/%Y'),
-                            'Descanso',
-                            0,
-                            0,
-                            0,
-                            'N/A',
-                            'N/A',
-                            'Dia de recuperação'
-                        ]
-                    else:
-                        # Valida e formata valores numéricos
-                        distancia = min(max(float(treino.get('distancia', 5)), 3), 42)
-                        duracao = min(max(float(treino.get('duracao', 30)), 20), 240)
-                        ritmo = min(max(float(treino.get('ritmo', 6)), 4), 8)
-                        
-                        row = [
-                            data.strftime('%d/%m/%Y'),
-                            treino.get('tipo', ''),
-                            f"{distancia:.1f}",
-                            f"{duracao:.0f}",
-                            f"{ritmo:.2f}",
-                            'Z1-Z3',  # Zona de FC padrão
-                            'Livre',  # Percurso padrão
-                            treino.get('observacoes', '')[:100]  # Limita tamanho das observações
-                        ]
-                    
-                    writer.writerow(row)
-                    data += timedelta(days=1)
-                
             return filename if os.path.exists(filename) else None
             
         except Exception as e:
@@ -555,67 +953,28 @@ class TrainingAI:
     def gerar_tcx_garmin(self, plano_texto, filename):
         """Gera arquivo TCX para Garmin"""
         try:
-            root = ET.Element('TrainingCenterDatabase')
-            root.set('xmlns', 'http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2')
-            
-            workouts = ET.SubElement(root, 'Workouts')
             treinos = self.extrair_treinos(plano_texto)
             
-            for i, treino in enumerate(treinos, 1):
-                workout = ET.SubElement(workouts, 'Workout')
-                workout.set('Sport', 'Running')
-                
-                name = ET.SubElement(workout, 'Name')
-                name.text = f"Treino {i} - {treino.get('tipo', '')}"
-                
-                steps = ET.SubElement(workout, 'Steps')
-                self.adicionar_passos_tcx(steps, treino)
-            
-            tree = ET.ElementTree(root)
-            tree.write(filename, encoding='utf-8', xml_declaration=True)
+            # Garante valores válidos
+            distancias, _, _, velocidades = self._normalizar_treinos(treinos)
+            metros = (distancias * 1000).astype(int)  # Converte para metros
+            
+            # O TCX é quase todo estático: formata o template de cada treino direto no arquivo
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(TCX_INICIO)
+                for i, tipo in enumerate(treinos['tipo']):
+                    f.write(TCX_TREINO.format(
+                        nome=escape(f"Treino {i + 1} - {tipo}"),
+                        metros=metros[i],
+                        velocidade=float(velocidades[i])
+                    ))
+                f.write(TCX_FIM)
             
             return filename
         except Exception as e:
             print(f"Erro ao gerar TCX: {str(e)}")
             return None
 
-    def adicionar_passos_tcx(self, steps, treino):
-        """Adiciona os passos do treino ao TCX"""
-        try:
-            # Garante valores válidos
-            distancia = min(max(float(treino.get('distancia', 5)), 3), 42)
-            ritmo = min(max(float(treino.get('ritmo', 6)), 4), 8)
-            
-            # Aquecimento
-            step = ET.SubElement(steps, 'Step')
-            step.set('Type', 'Warmup')
-            duration = ET.SubElement(step, 'Duration')
-            duration.set('Type', 'Time')
-            duration.text = '600'  # 10 minutos em segundos
-            
-            # Treino principal
-            step = ET.SubElement(steps, 'Step')
-            step.set('Type', 'Run')
-            duration = ET.SubElement(step, 'Duration')
-            duration.set('Type', 'Distance')
-            duration.text = str(int(distancia * 1000))  # Converte para metros
-            
-            target = ET.SubElement(step, 'Target')
-            target.set('Type', 'Speed')
-            zone = ET.SubElement(target, 'Zone')
-            speed_high = ET.SubElement(zone, 'SpeedHigh')
-            speed_high.text = str(1000 / (ritmo * 60))  # Converte min/km para m/s
-            
-            # Desaquecimento
-            step = ET.SubElement(steps, 'Step')
-            step.set('Type', 'Cooldown')
-            duration = ET.SubElement(step, 'Duration')
-            duration.set('Type', 'Time')
-            duration.text = '300'  # 5 minutos em segundos
-            
-        except Exception as e:
-            print(f"Erro ao adicionar passos TCX: {str(e)}")
-
 if __name__ == "__main__":
     from garmin_connect import testar_garmin
     